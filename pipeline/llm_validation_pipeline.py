@@ -1,10 +1,12 @@
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from src.llm_validator import (
     configure_gemini_api,
     load_prompt_template,
     run_llm_prediction,
-    save_llm_predictions,
+    append_llm_predictions,
+    finalize_predictions,
     retry_llm_predictions
 )
 from src.config import (
@@ -25,11 +27,13 @@ def run_llm_validation_pipeline(
     retry_failed_fulltext_zeroshot: bool = True,
     retry_failed_fulltext_fewshot_cot: bool = False,
     sleep_time: float = 1.0,
-    timeout: int = 180
+    timeout: int = 180,
+    max_workers: int = 5,
+    use_batch: bool = False
 ):
     """
     LLM検証パイプラインを実行します。
-    アブストラクトおよび全文を用いた予測、および失敗した予測の再試行が含まれます。
+    アブストラクトおよび全文を用いた予測（並列に実行）、および失敗した予測の再試行が含まれます。
 
     Args:
         api_key (str): Gemini APIキー。
@@ -44,6 +48,8 @@ def run_llm_validation_pipeline(
         retry_failed_fulltext_fewshot_cot (bool): 失敗した全文Few-shot CoT予測を再試行するかどうか。
         sleep_time (float): APIリクエスト間の待機時間（秒）。
         timeout (int): APIリクエストのタイムアウト時間（秒）。
+        max_workers (int): 各予測でLLM APIへの並列リクエストに使用するスレッド数。3種類の予測は同時に実行されるため、最大でこの3倍のリクエストが並列に送信されます。
+        use_batch (bool): 各予測をGemini APIのバッチモードでまとめて送信するかどうか（再試行は通常のリクエストで行います）。
     """
     print("--- LLM検証フェーズ開始 ---")
 
@@ -55,71 +61,94 @@ def run_llm_validation_pipeline(
             print("--- LLM検証フェーズ完了 ---")
             return
 
-        # アブストラクト予測
-        if run_abstract_prediction:
-            print("\n--- アブストラクトを用いたLLM予測を開始 ---")
-            prompt_template_abstract = load_prompt_template(PROMPT_FILE_ZERO_SHOT_ABSTRACT)
-            df_abstract_targets = df_samples.dropna(subset=['abstract']).copy()
-            if not df_abstract_targets.empty:
-                df_predictions_abstract = run_llm_prediction(
-                    df_to_process=df_abstract_targets,
-                    prompt_template=prompt_template_abstract,
-                    text_column='abstract',
-                    prediction_column_name='prediction_rule3_abstract',
-                    model_name=model_name,
-                    api_key=api_key,
-                    sleep_time=sleep_time,
-                    timeout=timeout
-                )
-                save_llm_predictions(df_predictions_abstract, output_file_path=output_predictions_csv, prediction_column_name='prediction_rule3_abstract')
-            else:
-                print("アブストラクトが利用可能な論文がないため、アブストラクト予測をスキップします。")
+        # 予測と再試行で共通の対象論文は、ここで1回だけ抽出する
+        df_abstract_targets = df_samples.dropna(subset=['abstract']).reset_index(drop=True)
+        df_fulltext_targets = df_samples.dropna(subset=['full_text']).drop_duplicates(subset=['citing_paper_doi'], keep='first').reset_index(drop=True)
 
-        # 全文Zero-shot予測
-        if run_fulltext_zeroshot_prediction:
-            print("\n--- 全文を用いたZero-shot LLM予測を開始 ---")
-            prompt_template_fulltext_zeroshot = load_prompt_template(PROMPT_FILE_ZERO_SHOT_FULLTEXT)
-            df_fulltext_targets = df_samples.dropna(subset=['full_text']).copy()
-            df_fulltext_targets.drop_duplicates(subset=['citing_paper_doi'], inplace=True, keep='first')
-            df_fulltext_targets.reset_index(drop=True, inplace=True)
-            if not df_fulltext_targets.empty:
-                prediction_column_name_zeroshot = f"prediction_rule3_{model_name.replace('.', '_')}_zeroshot"
-                df_predictions_fulltext_zeroshot = run_llm_prediction(
-                    df_to_process=df_fulltext_targets,
-                    prompt_template=prompt_template_fulltext_zeroshot,
-                    text_column='full_text',
-                    prediction_column_name=prediction_column_name_zeroshot,
-                    model_name=model_name,
-                    api_key=api_key,
-                    sleep_time=sleep_time,
-                    timeout=timeout
-                )
-                save_llm_predictions(df_predictions_fulltext_zeroshot, output_file_path=output_predictions_csv, prediction_column_name=prediction_column_name_zeroshot)
-            else:
-                print("全文が利用可能な論文がないため、全文Zero-shot予測をスキップします。")
+        # 3種類の予測は互いに独立しているため、並列に実行してAPIの待ち時間を重ねる
+        stage_futures = []
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # アブストラクト予測
+            if run_abstract_prediction:
+                print("\n--- アブストラクトを用いたLLM予測を開始 ---")
+                prompt_template_abstract = load_prompt_template(PROMPT_FILE_ZERO_SHOT_ABSTRACT)
+                if not df_abstract_targets.empty:
+                    stage_futures.append(('prediction_rule3_abstract', executor.submit(
+                        run_llm_prediction,
+                        df_to_process=df_abstract_targets,
+                        prompt_template=prompt_template_abstract,
+                        text_column='abstract',
+                        prediction_column_name='prediction_rule3_abstract',
+                        model_name=model_name,
+                        api_key=api_key,
+                        sleep_time=sleep_time,
+                        timeout=timeout,
+                        max_workers=max_workers,
+                        use_batch=use_batch
+                    )))
+                else:
+                    print("アブストラクトが利用可能な論文がないため、アブストラクト予測をスキップします。")
 
-        # 全文Few-shot CoT予測
-        if run_fulltext_fewshot_cot_prediction:
-            print("\n--- 全文を用いたFew-shot CoT LLM予測を開始 ---")
-            prompt_template_fulltext_fewshot_cot = load_prompt_template(PROMPT_FILE_FEW_SHOT_COT_FULLTEXT)
-            df_fulltext_targets = df_samples.dropna(subset=['full_text']).copy()
-            df_fulltext_targets.drop_duplicates(subset=['citing_paper_doi'], inplace=True, keep='first')
-            df_fulltext_targets.reset_index(drop=True, inplace=True)
-            if not df_fulltext_targets.empty:
-                prediction_column_name_fewshot_cot = f"prediction_rule3_{model_name.replace('.', '_')}_few_shot_cot"
-                df_predictions_fulltext_fewshot_cot = run_llm_prediction(
-                    df_to_process=df_fulltext_targets,
-                    prompt_template=prompt_template_fulltext_fewshot_cot,
-                    text_column='full_text',
-                    prediction_column_name=prediction_column_name_fewshot_cot,
-                    model_name=model_name,
-                    api_key=api_key,
-                    sleep_time=sleep_time,
-                    timeout=timeout
-                )
-                save_llm_predictions(df_predictions_fulltext_fewshot_cot, output_file_path=output_predictions_csv, prediction_column_name=prediction_column_name_fewshot_cot)
-            else:
-                print("全文が利用可能な論文がないため、全文Few-shot CoT予測をスキップします。")
+            # 全文Zero-shot予測
+            if run_fulltext_zeroshot_prediction:
+                print("\n--- 全文を用いたZero-shot LLM予測を開始 ---")
+                prompt_template_fulltext_zeroshot = load_prompt_template(PROMPT_FILE_ZERO_SHOT_FULLTEXT)
+                if not df_fulltext_targets.empty:
+                    prediction_column_name_zeroshot = f"prediction_rule3_{model_name.replace('.', '_')}_zeroshot"
+                    stage_futures.append((prediction_column_name_zeroshot, executor.submit(
+                        run_llm_prediction,
+                        df_to_process=df_fulltext_targets,
+                        prompt_template=prompt_template_fulltext_zeroshot,
+                        text_column='full_text',
+                        prediction_column_name=prediction_column_name_zeroshot,
+                        model_name=model_name,
+                        api_key=api_key,
+                        sleep_time=sleep_time,
+                        timeout=timeout,
+                        max_workers=max_workers,
+                        use_batch=use_batch
+                    )))
+                else:
+                    print("全文が利用可能な論文がないため、全文Zero-shot予測をスキップします。")
+
+            # 全文Few-shot CoT予測
+            if run_fulltext_fewshot_cot_prediction:
+                print("\n--- 全文を用いたFew-shot CoT LLM予測を開始 ---")
+                prompt_template_fulltext_fewshot_cot = load_prompt_template(PROMPT_FILE_FEW_SHOT_COT_FULLTEXT)
+                if not df_fulltext_targets.empty:
+                    prediction_column_name_fewshot_cot = f"prediction_rule3_{model_name.replace('.', '_')}_few_shot_cot"
+                    stage_futures.append((prediction_column_name_fewshot_cot, executor.submit(
+                        run_llm_prediction,
+                        df_to_process=df_fulltext_targets,
+                        prompt_template=prompt_template_fulltext_fewshot_cot,
+                        text_column='full_text',
+                        prediction_column_name=prediction_column_name_fewshot_cot,
+                        model_name=model_name,
+                        api_key=api_key,
+                        sleep_time=sleep_time,
+                        timeout=timeout,
+                        max_workers=max_workers,
+                        use_batch=use_batch
+                    )))
+                else:
+                    print("全文が利用可能な論文がないため、全文Few-shot CoT予測をスキップします。")
+
+        # 各予測はサイドカーCSVに追記し、全ての予測が終わった後で予測結果CSVにまとめて書き込む
+        # 一部の予測が失敗しても、成功した予測を書き込んでサイドカーを片付けてから例外を送出する
+        predicted_columns = []
+        stage_errors = []
+        for prediction_column_name, future in stage_futures:
+            try:
+                append_llm_predictions(future.result(), output_file_path=output_predictions_csv, prediction_column_name=prediction_column_name)
+            except Exception as e:
+                print(f"エラー: 予測 '{prediction_column_name}' の実行中にエラーが発生しました: {e}")
+                stage_errors.append(e)
+                continue
+            predicted_columns.append(prediction_column_name)
+
+        finalize_predictions(output_file_path=output_predictions_csv, prediction_column_names=predicted_columns)
+        if stage_errors:
+            raise stage_errors[0]
 
         # 失敗した予測の再試行
         if retry_failed_abstract and run_abstract_prediction:
@@ -133,7 +162,9 @@ def run_llm_validation_pipeline(
                 model_name=model_name,
                 api_key=api_key,
                 sleep_time=sleep_time,
-                timeout=timeout
+                timeout=timeout,
+                max_workers=max_workers,
+                df_samples=df_abstract_targets
             )
         
         if retry_failed_fulltext_zeroshot and run_fulltext_zeroshot_prediction:
@@ -147,7 +178,9 @@ def run_llm_validation_pipeline(
                 model_name=model_name,
                 api_key=api_key,
                 sleep_time=sleep_time,
-                timeout=timeout
+                timeout=timeout,
+                max_workers=max_workers,
+                df_samples=df_fulltext_targets
             )
 
         if retry_failed_fulltext_fewshot_cot and run_fulltext_fewshot_cot_prediction:
@@ -161,7 +194,9 @@ def run_llm_validation_pipeline(
                 model_name=model_name,
                 api_key=api_key,
                 sleep_time=sleep_time,
-                timeout=timeout
+                timeout=timeout,
+                max_workers=max_workers,
+                df_samples=df_fulltext_targets
             )
 
     except FileNotFoundError as e:
@@ -67,7 +67,9 @@ def main_pipeline(args):
             retry_failed_fulltext_zeroshot=args.retry_failed_fulltext_zeroshot,
             retry_failed_fulltext_fewshot_cot=args.retry_failed_fulltext_fewshot_cot,
             sleep_time=args.llm_sleep_time,
-            timeout=args.llm_timeout
+            timeout=args.llm_timeout,
+            max_workers=args.llm_max_workers,
+            use_batch=args.llm_use_batch
         )
 
     # フェーズ5: 評価と分析
@@ -131,6 +133,8 @@ if __name__ == "__main__":
     parser.add_argument("--retry_failed_fulltext_fewshot_cot", action="store_true", help="失敗した全文Few-shot CoT予測を再試行")
     parser.add_argument("--llm_sleep_time", type=float, default=1.0, help="LLM APIリクエスト間の待機時間（秒）")
     parser.add_argument("--llm_timeout", type=int, default=180, help="LLM APIリクエストのタイムアウト時間（秒）")
+    parser.add_argument("--llm_max_workers", type=int, default=5, help="LLM APIリクエストの並列処理スレッド数")
+    parser.add_argument("--llm_use_batch", action="store_true", help="Gemini APIのバッチモードでLLM予測をまとめて送信")
 
     # review_and_correct_pipeline の引数
     parser.add_argument("--best_model_column", type=str, default='prediction_rule3_gemini-2_5-flash', help="レビュー対象のLLM予測結果カラム名")
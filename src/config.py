@@ -13,6 +13,13 @@ GEMINI_MODEL_NAME = 'gemini-1.5-flash'
 PROMPT_FILE_ZERO_SHOT_ABSTRACT = 'prompts/zero_shot_abstract.txt'
 PROMPT_FILE_ZERO_SHOT_FULLTEXT = 'prompts/zero_shot_fulltext.txt'
 PROMPT_FILE_FEW_SHOT_COT_FULLTEXT = 'prompts/few_shot_cot_fulltext.txt'
+LLM_CACHE_DIR = 'data/cache/gemini' # プロンプトごとのAPIレスポンスのキャッシュ
+LLM_CACHE_EXPIRE_SECONDS = 30 * 24 * 60 * 60 # キャッシュの有効期限（30日）
+LLM_BATCH_POLL_INTERVAL = 30 # バッチジョブの状態確認間隔（秒）
+LLM_BATCH_MAX_WAIT = 24 * 60 * 60 # バッチジョブの完了を待つ最大時間（秒）。超えた場合はジョブを取り消す
+LLM_BREAKER_THRESHOLD = 5 # 連続してこの回数APIエラーが起きたらリクエストを一時停止する
+LLM_BREAKER_COOLDOWN = 30 # リクエストを一時停止する時間（秒）
+LLM_BREAKER_MAX_WAIT = 60 # ブレーカーが開いている間、1件のリクエストが再開を待つ最大時間（秒）
 
 
 # Data Paths
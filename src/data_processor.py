@@ -1,6 +1,10 @@
 import pandas as pd
 import os
-import xml.etree.ElementTree as ET
+# テキスト抽出関数に渡す要素は、src.text_extractorと同じXMLライブラリでパースする
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 from tqdm import tqdm
 
 from src.config import (
@@ -1,19 +1,61 @@
 import pandas as pd
 import os
 import google.generativeai as genai
-import json
 import time
+import hashlib
+import string
+import threading
+import csv
+from functools import lru_cache
 from tqdm import tqdm
-import re
 import requests # For direct API calls in fulltext prediction
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 
 from src.config import (
     GEMINI_API_KEY, GEMINI_MODEL_NAME,
     PROMPT_FILE_ZERO_SHOT_ABSTRACT, PROMPT_FILE_ZERO_SHOT_FULLTEXT, PROMPT_FILE_FEW_SHOT_COT_FULLTEXT,
+    LLM_CACHE_DIR, LLM_CACHE_EXPIRE_SECONDS, LLM_BATCH_POLL_INTERVAL, LLM_BATCH_MAX_WAIT,
+    LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN, LLM_BREAKER_MAX_WAIT,
     OUTPUT_FILE_SAMPLES_WITH_TEXT, OUTPUT_FILE_PREDICTION_LLM,
     OUTPUT_DIR_PROCESSED
 )
 
+# pyarrowがインストールされていれば、CSVの読み込みに高速なpyarrowエンジンを使用する
+try:
+    import pyarrow # noqa: F401
+    _READ_CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _READ_CSV_ENGINE = 'c'
+
+# 環境変数DUV_FAST_IOが設定され、polarsがインストールされていれば、大きな予測結果ファイルの更新にpolarsを使用する
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+def _use_polars() -> bool:
+    return pl is not None and bool(os.environ.get('DUV_FAST_IO'))
+
+# 論文情報の列と予測結果の列は型が決まっているため、読み込み時の型推論を省略する
+_PREDICTION_DTYPES = {
+    'citing_paper_eid': 'string',
+    'citing_paper_doi': 'string',
+    'citing_paper_title': 'string',
+    'cited_data_paper_title': 'string'
+}
+_PREDICTION_VALUE_DTYPE = 'Int8' # 欠損値があってもfloat64にならない整数型
+
+def _read_csv(file_path: str, prediction_columns: list = None) -> pd.DataFrame:
+    """
+    利用可能な最速のエンジンでCSVファイルを読み込む。
+    論文情報の列と、prediction_columnsで指定した予測結果の列には明示的に型を指定する。
+    """
+    dtype = dict(_PREDICTION_DTYPES)
+    dtype.update({column: _PREDICTION_VALUE_DTYPE for column in prediction_columns or []})
+    return pd.read_csv(file_path, engine=_READ_CSV_ENGINE, dtype=dtype)
+
 def configure_gemini_api(api_key: str = GEMINI_API_KEY):
     """
     Gemini APIキーを設定します。
@@ -25,9 +67,16 @@ def configure_gemini_api(api_key: str = GEMINI_API_KEY):
         print(f"Gemini APIキーの設定でエラー: {e}")
         raise
 
+@lru_cache(maxsize=16)
+def _load_prompt_template_cached(prompt_file_path: str, mtime_ns: int) -> str:
+    """プロンプトファイルを読み込む。ファイルが更新されるとmtime_nsが変わり、キャッシュが無効になる"""
+    with open(prompt_file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 def load_prompt_template(prompt_file_path: str) -> str:
     """
     指定されたパスからプロンプトテンプレートを読み込みます。
+    同じファイルの2回目以降の読み込みは、ファイルが更新されていなければキャッシュから返します。
 
     Args:
         prompt_file_path (str): プロンプトファイルのパス。
@@ -36,8 +85,7 @@ def load_prompt_template(prompt_file_path: str) -> str:
         str: 読み込まれたプロンプトテンプレート。
     """
     try:
-        with open(prompt_file_path, 'r', encoding='utf-8') as f:
-            prompt_template = f.read()
+        prompt_template = _load_prompt_template_cached(prompt_file_path, os.stat(prompt_file_path).st_mtime_ns)
         print(f"プロンプトファイル '{prompt_file_path}' を正常に読み込みました。")
         return prompt_template
     except FileNotFoundError:
@@ -47,28 +95,287 @@ def load_prompt_template(prompt_file_path: str) -> str:
         print(f"プロンプトファイルの読み込み中にエラーが発生しました: {e}")
         raise
 
-def _call_gemini_api(prompt: str, model_name: str, api_key: str, timeout: int = 120) -> str or None:
+def _compile_prompt_template(prompt_template: str) -> list:
+    """
+    プロンプトテンプレートを事前に解析し、(リテラル文字列, フィールド名) のリストに変換します。
+    行ごとにstr.formatでテンプレートを再解析するのを避けるために使用します。
+
+    Args:
+        prompt_template (str): プロンプトのテンプレート。
+
+    Returns:
+        list: (リテラル文字列, フィールド名またはNone) のタプルのリスト。
+    """
+    compiled_template = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(prompt_template):
+        if format_spec or conversion:
+            raise ValueError(f"プロンプトテンプレートの書式指定には対応していません: {{{field_name}}}")
+        compiled_template.append((literal, field_name))
+    return compiled_template
+
+def _render_prompt(compiled_template: list, values: dict) -> str:
+    """事前に解析したテンプレートに値を埋め込み、プロンプトを生成する"""
+    return ''.join(
+        literal if field_name is None else literal + str(values[field_name])
+        for literal, field_name in compiled_template
+    )
+
+def _get_cache_path(prompt: str, model_name: str) -> str:
+    """モデル名とプロンプトのSHA256ハッシュからキャッシュファイルのパスを返す"""
+    key = hashlib.sha256(f"{model_name}\x00{prompt}".encode('utf-8')).hexdigest()
+    return os.path.join(LLM_CACHE_DIR, f"{key}.txt")
+
+def _read_cached_response(cache_path: str) -> str or None:
+    """有効期限内のキャッシュがあればレスポンステキストを返す"""
+    try:
+        if time.time() - os.path.getmtime(cache_path) > LLM_CACHE_EXPIRE_SECONDS:
+            return None
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_cached_response(cache_path: str, response_text: str):
+    """レスポンステキストをキャッシュに保存する（並列実行を考慮し、一時ファイル経由で置き換える）"""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(response_text)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"警告: LLMレスポンスのキャッシュ保存に失敗しました: {e}")
+
+# Gemini APIへの接続を使い回すためのセッション（TLSハンドシェイクをリクエストごとに行わない）
+# 一時的なエラー（429・5xx）はアダプター側で指数バックオフしながら再試行する
+# 再試行し尽くした場合も最後のレスポンスを返させ（raise_on_status=False）、429をサーキットブレーカーに伝える
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=frozenset(['GET', 'POST']), raise_on_status=False)
+))
+
+class _CircuitBreaker:
+    """
+    Gemini APIの連続エラーを検知し、一定時間リクエストを止めるサーキットブレーカー。
+    レート制限（429）を受けた場合は待機時間を倍に伸ばし、成功するたびに少しずつ元に戻します（AIMD）。
+    並列スレッドから共有されるため、状態の更新はロックで保護し、再開を待つスレッドには状態の変化を通知します。
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, cooldown: float = LLM_BREAKER_COOLDOWN, max_backoff: float = 32.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.opened_at = None
+        self.backoff = 1.0 # sleep_timeに掛ける倍率
+        self._cond = threading.Condition()
+
+    def is_open(self) -> bool:
+        """リクエストを止めている（クールダウン中の）状態かどうかを返す"""
+        with self._cond:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self, max_wait: float = 0.0) -> bool:
+        """
+        リクエストを送ってよいかを返す。クールダウン明けは1件だけ試行を許可する（半開状態）。
+        max_waitを指定した場合は、送れるようになるまで最大max_wait秒待つ。
+        試行を許可された呼び出し側は、必ずrecord_successかrecord_failureで結果を記録すること。
+        """
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            while True:
+                if self.opened_at is None:
+                    return True
+                now = time.monotonic()
+                if now - self.opened_at >= self.cooldown:
+                    # 試行中の1件以外は、試行の結果が記録されるか次のクールダウンが明けるまで待たせる
+                    self.opened_at = now
+                    return True
+                remaining = min(self.opened_at + self.cooldown, deadline) - now
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    def record_success(self):
+        with self._cond:
+            self.failures = 0
+            self.opened_at = None
+            self.backoff = max(1.0, self.backoff - 0.5)
+            self._cond.notify_all()
+
+    def record_failure(self, rate_limited: bool = False):
+        with self._cond:
+            self.failures += 1
+            if rate_limited:
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    print(f"APIエラーが{self.failures}回連続したため、{self.cooldown}秒間リクエストを停止します。")
+                self.opened_at = time.monotonic()
+            self._cond.notify_all()
+
+_gemini_breaker = _CircuitBreaker()
+
+def _call_gemini_api(prompt: str, model_name: str, api_key: str, timeout: int = 120, use_cache: bool = True, breaker_wait: float = 0.0) -> str or None:
     """
     Gemini APIを直接呼び出し、レスポンステキストを返します。
+    use_cacheがTrueの場合、同じモデル・プロンプトに対する過去のレスポンスをディスクキャッシュから返します。
+    サーキットブレーカーが開いている場合は、最大breaker_wait秒まで再開を待ち、それでも送れなければNoneを返します。
     """
+    cache_path = _get_cache_path(prompt, model_name) if use_cache else None
+    if cache_path:
+        cached_text = _read_cached_response(cache_path)
+        if cached_text is not None:
+            return cached_text
+
+    if not _gemini_breaker.allow(breaker_wait):
+        return None
+
     api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
     
     try:
-        response = requests.post(api_url, json=payload, timeout=timeout)
+        response = _SESSION.post(api_url, json=payload, timeout=timeout)
         response.raise_for_status()
         response_json = response.json()
-        return response_json['candidates'][0]['content']['parts'][0]['text']
+        response_text = response_json['candidates'][0]['content']['parts'][0]['text']
     except requests.exceptions.RequestException as e:
         print(f"APIリクエストエラー: {e}")
+        # レート制限・サーバーエラー・タイムアウトなどの一時的な障害のみを失敗として記録する
+        # それ以外（429以外の4xx）はAPI自体は応答しているため成功として記録し、半開状態の試行を終わらせる
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code is None or status_code == 429 or status_code >= 500:
+            _gemini_breaker.record_failure(rate_limited=status_code == 429)
+        else:
+            _gemini_breaker.record_success()
         return None
     except (KeyError, IndexError) as e:
         print(f"APIレスポンス解析エラー: {e}")
+        _gemini_breaker.record_success()
         return None
     except Exception as e:
         print(f"予期せぬエラー: {e}")
+        _gemini_breaker.record_failure()
         return None
 
+    _gemini_breaker.record_success()
+    # 判定が読み取れないレスポンスをキャッシュすると再試行時にも同じ失敗が返るため、保存しない
+    if cache_path and _parse_llm_decisions([response_text]).iloc[0] != -1:
+        _write_cached_response(cache_path, response_text)
+    return response_text
+
+def _cancel_gemini_batch(base_url: str, batch_name: str, headers: dict, timeout: int):
+    """バッチジョブの取り消しを要求する。失敗しても処理は続ける"""
+    try:
+        _SESSION.post(f"{base_url}/{batch_name}:cancel", headers=headers, timeout=timeout).raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"警告: バッチジョブ '{batch_name}' の取り消しに失敗しました: {e}")
+
+def _call_gemini_batch(prompts: list, model_name: str, api_key: str, timeout: int = 120, poll_interval: float = LLM_BATCH_POLL_INTERVAL, max_wait: float = LLM_BATCH_MAX_WAIT) -> list:
+    """
+    Gemini APIのバッチモードで複数のプロンプトをまとめて送信し、ジョブ完了後にレスポンステキストを返します。
+    max_waitを過ぎても完了しない場合はジョブを取り消し、全てのプロンプトを失敗（None）として返します（後で再試行できるようにするため）。
+
+    Args:
+        prompts (list): 送信するプロンプトのリスト。
+        model_name (str): 使用するGeminiモデルの名前。
+        api_key (str): Gemini APIキー。
+        timeout (int): 各HTTPリクエストのタイムアウト時間（秒）。
+        poll_interval (float): ジョブ状態を確認する間隔（秒）。
+        max_wait (float): ジョブの完了を待つ最大時間（秒）。
+
+    Returns:
+        list: promptsと同じ順序のレスポンステキストのリスト。失敗した要素はNone。
+    """
+    base_url = "https://generativelanguage.googleapis.com/v1beta"
+    headers = {"x-goog-api-key": api_key}
+    payload = {
+        "batch": {
+            "display_name": f"data-usage-validator-{int(time.time())}",
+            "input_config": {"requests": {"requests": [
+                {"request": {"contents": [{"parts": [{"text": prompt}]}]}, "metadata": {"key": str(i)}}
+                for i, prompt in enumerate(prompts)
+            ]}}
+        }
+    }
+    responses = [None] * len(prompts)
+
+    try:
+        response = _SESSION.post(f"{base_url}/models/{model_name}:batchGenerateContent", json=payload, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        batch_name = response.json()['name']
+        print(f"バッチジョブ '{batch_name}' を作成しました。完了を待機します。")
+
+        deadline = time.monotonic() + max_wait
+        while True:
+            response = _SESSION.get(f"{base_url}/{batch_name}", headers=headers, timeout=timeout)
+            response.raise_for_status()
+            batch_job = response.json()
+            state = batch_job.get('metadata', {}).get('state')
+            if state == 'BATCH_STATE_SUCCEEDED':
+                break
+            if state in ('BATCH_STATE_FAILED', 'BATCH_STATE_CANCELLED', 'BATCH_STATE_EXPIRED'):
+                print(f"バッチジョブが終了しました（状態: {state}）。")
+                return responses
+            if state not in ('BATCH_STATE_PENDING', 'BATCH_STATE_RUNNING'):
+                print(f"警告: バッチジョブが想定外の状態です（状態: {state}）。完了を待ち続けます。")
+            if time.monotonic() >= deadline:
+                print(f"バッチジョブが{max_wait}秒以内に完了しなかったため、取り消します（状態: {state}）。")
+                _cancel_gemini_batch(base_url, batch_name, headers, timeout)
+                return responses
+            time.sleep(poll_interval)
+
+        inlined_responses = batch_job['response']['inlinedResponses']['inlinedResponses']
+        for i, item in enumerate(inlined_responses):
+            # metadataのkeyで元のプロンプトの位置に戻す
+            index = int(item.get('metadata', {}).get('key', i))
+            try:
+                responses[index] = item['response']['candidates'][0]['content']['parts'][0]['text']
+            except (KeyError, IndexError):
+                print(f"警告: バッチ内の {index} 件目のレスポンスを解析できませんでした: {item.get('error')}")
+    except requests.exceptions.RequestException as e:
+        print(f"バッチAPIリクエストエラー: {e}")
+    except (KeyError, IndexError, ValueError) as e:
+        print(f"バッチAPIレスポンス解析エラー: {e}")
+
+    return responses
+
+def _parse_llm_decisions(responses: list) -> pd.Series:
+    """
+    LLMのレスポンステキストのリストから判定結果をまとめて取り出します。
+    各レスポンスをjson.loadsする代わりに、"decision"の値を正規表現で一括抽出します。
+
+    Args:
+        responses (list): レスポンステキストのリスト（失敗した要素はNone）。
+
+    Returns:
+        pd.Series: "Used"なら1、それ以外の判定なら0、判定が読み取れない場合やエラー時は-1。
+    """
+    decisions = pd.Series(responses, dtype=object).str.extract(r'"decision"\s*:\s*"([^"]*)"', expand=False)
+    predictions = (decisions == "Used").astype(int)
+    predictions[decisions.isna()] = -1
+    return predictions
+
+def _request_prediction(prompt: str, citing_paper_doi: str, model_name: str, api_key: str, sleep_time: float, timeout: int) -> str or None:
+    """
+    1件のプロンプトをLLMに送信し、レスポンステキストを返します。
+
+    Returns:
+        str or None: レスポンステキスト。エラー時はNone。
+    """
+    response_text = None
+    try:
+        # ブレーカーが開いている間は、即座にエラー扱いにせずクールダウンが明けるのを待つ
+        # （直後に実行される再試行も含め、障害が収まった後のリクエストが失敗しないようにする）
+        response_text = _call_gemini_api(prompt, model_name, api_key, timeout, breaker_wait=LLM_BREAKER_MAX_WAIT)
+    except Exception as e:
+        print(f"警告: DOI {citing_paper_doi} の処理中にエラーが発生しました: {e}")
+        
+    time.sleep(sleep_time * _gemini_breaker.backoff)
+    return response_text
+
 def run_llm_prediction(
     df_to_process: pd.DataFrame,
     prompt_template: str,
@@ -77,10 +384,14 @@ def run_llm_prediction(
     model_name: str = GEMINI_MODEL_NAME,
     api_key: str = GEMINI_API_KEY,
     sleep_time: float = 1.0,
-    timeout: int = 120
+    timeout: int = 120,
+    max_workers: int = 5,
+    use_batch: bool = False
 ) -> pd.DataFrame:
     """
     LLMを使用して論文のデータ利用を予測します。
+    APIリクエストはスレッドプールで並列に送信されます。use_batchがTrueの場合は、
+    全プロンプトを1つのバッチジョブとしてまとめて送信します（料金は半額になりますが、完了まで時間がかかります）。
 
     Args:
         df_to_process (pd.DataFrame): 処理対象の論文データDataFrame。
@@ -89,8 +400,10 @@ def run_llm_prediction(
         prediction_column_name (str): 予測結果を格納する新しい列名。
         model_name (str): 使用するGeminiモデルの名前。
         api_key (str): Gemini APIキー。
-        sleep_time (float): APIリクエスト間の待機時間（秒）。
+        sleep_time (float): APIリクエスト間の待機時間（秒）。スレッドごとに適用されます。
         timeout (int): APIリクエストのタイムアウト時間（秒）。
+        max_workers (int): 並列リクエストに使用するスレッド数。
+        use_batch (bool): Gemini APIのバッチモードを使用するかどうか。
 
     Returns:
         pd.DataFrame: 予測結果が追加されたDataFrame。
@@ -99,45 +412,60 @@ def run_llm_prediction(
         print("処理対象のデータがありません。LLM予測をスキップします。")
         return pd.DataFrame()
 
-    predictions = []
-
-    print(f"合計 {len(df_to_process)} 件の論文に対してLLM({text_column}, {model_name})の判定を実行します。")
-
-    for index, row in tqdm(df_to_process.iterrows(), total=len(df_to_process), desc=f"LLM({text_column})で判定中"):
-        
-        text_content = row.get(text_column, '')
+    compiled_template = _compile_prompt_template(prompt_template)
+    text_contents = df_to_process[text_column] if text_column in df_to_process.columns else [''] * len(df_to_process)
+    prompts = []
+    for cited_title, citing_title, text_content in zip(df_to_process['cited_data_paper_title'], df_to_process['citing_paper_title'], text_contents):
         # フルテキストの場合、トークン数上限を考慮して切り詰める
         if text_column == 'full_text':
             text_content = text_content[:30000] # 仮のトークン上限
         
-        prompt = prompt_template.format(
-            cited_data_paper_title=row['cited_data_paper_title'],
-            citing_paper_title=row['citing_paper_title'],
-            citing_paper_text=text_content
-        )
-        
-        prediction = -1 # デフォルトはエラー値
-        try:
-            response_text = _call_gemini_api(prompt, model_name, api_key, timeout)
-            
-            if response_text:
-                match = re.search(r"\{.*\}", response_text, re.DOTALL)
-                json_text = match.group(0) if match else response_text
-                json_response = json.loads(json_text)
-                
-                decision = json_response.get('decision')
-                prediction = 1 if decision == "Used" else 0
-            
-        except Exception as e:
-            print(f"警告: DOI {row['citing_paper_doi']} の処理中にエラーが発生しました: {e}")
-            
-        predictions.append(prediction)
-        time.sleep(sleep_time)
+        prompts.append(_render_prompt(compiled_template, {
+            'cited_data_paper_title': cited_title,
+            'citing_paper_title': citing_title,
+            'citing_paper_text': text_content
+        }))
+
+    # 同じプロンプトは1回だけ送信し、結果を全ての該当行に割り当てる
+    unique_prompts = {}
+    for prompt, doi in zip(prompts, df_to_process['citing_paper_doi']):
+        unique_prompts.setdefault(prompt, doi)
+
+    print(f"合計 {len(df_to_process)} 件（重複を除いて {len(unique_prompts)} 件）の論文に対してLLM({text_column}, {model_name})の判定を実行します。")
+
+    if use_batch:
+        unique_responses = _call_gemini_batch(list(unique_prompts), model_name, api_key, timeout)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 結果の順序は入力の順序と一致する
+            func = lambda prompt, doi: _request_prediction(prompt, doi, model_name, api_key, sleep_time, timeout)
+            unique_responses = list(tqdm(
+                executor.map(func, unique_prompts.keys(), unique_prompts.values()),
+                total=len(unique_prompts), desc=f"LLM({text_column})で判定中"
+            ))
+    response_map = dict(zip(unique_prompts, unique_responses))
+    responses = [response_map[prompt] for prompt in prompts]
+    predictions = _parse_llm_decisions(responses)
 
     df_results = df_to_process.copy()
-    df_results[prediction_column_name] = predictions
+    df_results[prediction_column_name] = predictions.to_numpy()
     return df_results
 
+_PREDICTION_BASE_COLUMNS = ['citing_paper_eid', 'citing_paper_doi', 'citing_paper_title', 'cited_data_paper_title']
+
+def _merge_prediction_column(existing_df: pd.DataFrame or None, df: pd.DataFrame, prediction_column_name: str) -> pd.DataFrame:
+    """
+    既存の予測結果DataFrameに、citing_paper_doiをキーとして新しい予測結果の列を追加（または上書き）します。
+    既存のDataFrameがない場合は、新しい予測結果から論文情報の列と予測列を取り出して返します。
+    """
+    if existing_df is None:
+        return df[_PREDICTION_BASE_COLUMNS + [prediction_column_name]].copy()
+    # citing_paper_doiをキーとした辞書で新しい予測結果を対応付ける
+    # 既に同名カラムがあれば上書きし、なければ追加する（対応するDOIがない行はNaN）
+    mapping = dict(zip(df['citing_paper_doi'], df[prediction_column_name]))
+    existing_df[prediction_column_name] = existing_df['citing_paper_doi'].map(mapping).astype(_PREDICTION_VALUE_DTYPE)
+    return existing_df
+
 def save_llm_predictions(df: pd.DataFrame, output_file_path: str = OUTPUT_FILE_PREDICTION_LLM, prediction_column_name: str = None):
     """
     LLMの予測結果をCSVファイルに保存します。
@@ -154,19 +482,17 @@ def save_llm_predictions(df: pd.DataFrame, output_file_path: str = OUTPUT_FILE_P
             output_dir = '.' # Current directory
         os.makedirs(output_dir, exist_ok=True)
         
+        if _use_polars() and os.path.exists(output_file_path):
+            _save_llm_predictions_polars(df, output_file_path, prediction_column_name)
+            return
+
         # 既存のファイルがあれば読み込み、マージする
         try:
-            existing_df = pd.read_csv(output_file_path)
-            # 既存のデータと新しい予測結果をマージ（結合）
-            # 既に同名カラムがあれば上書きし、なければ追加する
-            if prediction_column_name and prediction_column_name in existing_df.columns:
-                existing_df.drop(columns=[prediction_column_name], inplace=True)
-            
-            # citing_paper_doiをキーとしてマージ
-            df_to_save = pd.merge(existing_df, df[['citing_paper_doi', prediction_column_name]], on='citing_paper_doi', how='left')
+            existing_df = _read_csv(output_file_path, [prediction_column_name])
         except FileNotFoundError:
             # ファイルが存在しない場合は、新しいDataFrameをそのまま保存
-            df_to_save = df[['citing_paper_eid', 'citing_paper_doi', 'citing_paper_title', 'cited_data_paper_title', prediction_column_name]].copy()
+            existing_df = None
+        df_to_save = _merge_prediction_column(existing_df, df, prediction_column_name)
         
         df_to_save.to_csv(output_file_path, index=False, encoding='utf-8-sig')
         print(f"\n処理完了。LLMの予測結果を '{output_file_path}' に保存しました。")
@@ -176,6 +502,96 @@ def save_llm_predictions(df: pd.DataFrame, output_file_path: str = OUTPUT_FILE_P
     else:
         print("保存するデータがありませんでした。")
 
+def _save_llm_predictions_polars(df: pd.DataFrame, output_file_path: str, prediction_column_name: str):
+    """
+    既存の予測結果CSVをpolarsで遅延読み込みし、新しい予測結果の列を結合して保存します。
+    save_llm_predictionsのpandas版と同じく、既存の同名カラムはその位置のまま上書きし、対応するDOIがない行はnullになります。
+    """
+    df_update = df.drop_duplicates(subset=['citing_paper_doi'], keep='last')
+    update_lf = pl.DataFrame({
+        'citing_paper_doi': df_update['citing_paper_doi'].astype(str).tolist(),
+        prediction_column_name: [None if pd.isna(value) else int(value) for value in df_update[prediction_column_name]]
+    }, schema={'citing_paper_doi': pl.Utf8, prediction_column_name: pl.Int8}).lazy()
+
+    # 型推論を行わず、_read_csvと同じく論文情報の列は文字列、それ以外の予測列は整数として読み込む
+    # ヘッダーはBOMを除いて自前で読み、schemaで列名を与える（BOM付きの先頭列名を避けるため）
+    with open(output_file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        column_names = next(csv.reader(f))
+    schema = {column: pl.Utf8 if column in _PREDICTION_DTYPES else pl.Int8 for column in column_names}
+    existing_lf = pl.scan_csv(output_file_path, has_header=True, schema=schema)
+
+    output_columns = column_names if prediction_column_name in column_names else column_names + [prediction_column_name]
+    merged = (
+        existing_lf.drop(prediction_column_name, strict=False)
+        .join(update_lf, on='citing_paper_doi', how='left')
+        .select(output_columns)
+        .collect()
+    )
+
+    merged.write_csv(output_file_path, include_bom=True)
+    print(f"\n処理完了。LLMの予測結果を '{output_file_path}' に保存しました。")
+    print(f"\n--- 保存された結果の内訳 ({prediction_column_name}) ---")
+    print(merged.get_column(prediction_column_name).value_counts())
+
+def _get_sidecar_path(output_file_path: str, prediction_column_name: str) -> str:
+    """予測列ごとの追記用CSV（サイドカーファイル）のパスを返す"""
+    return os.path.join(os.path.dirname(output_file_path) or '.', f"predictions_{prediction_column_name}.csv")
+
+def append_llm_predictions(df: pd.DataFrame, output_file_path: str = OUTPUT_FILE_PREDICTION_LLM, prediction_column_name: str = None):
+    """
+    LLMの予測結果を、予測列ごとのサイドカーCSVに追記します。
+    予測結果CSV本体はfinalize_predictionsを呼び出すまで更新されません。
+
+    Args:
+        df (pd.DataFrame): 予測結果を含むDataFrame。
+        output_file_path (str): 最終的な予測結果CSVファイルのパス。
+        prediction_column_name (str): 予測結果の列名。
+    """
+    if df.empty:
+        print("保存するデータがありませんでした。")
+        return
+
+    sidecar_path = _get_sidecar_path(output_file_path, prediction_column_name)
+    os.makedirs(os.path.dirname(sidecar_path), exist_ok=True)
+    df[_PREDICTION_BASE_COLUMNS + [prediction_column_name]].to_csv(
+        sidecar_path, mode='a', header=not os.path.exists(sidecar_path), index=False, encoding='utf-8'
+    )
+    print(f"\nLLMの予測結果 ({prediction_column_name}) を '{sidecar_path}' に追記しました。")
+
+def finalize_predictions(output_file_path: str = OUTPUT_FILE_PREDICTION_LLM, prediction_column_names: list = None):
+    """
+    append_llm_predictionsで追記したサイドカーCSVを予測結果CSV本体に一度にまとめて書き込み、サイドカーを削除します。
+
+    Args:
+        output_file_path (str): 予測結果CSVファイルのパス。
+        prediction_column_names (list): まとめる予測結果の列名のリスト。
+    """
+    sidecar_paths = {column: _get_sidecar_path(output_file_path, column) for column in prediction_column_names or []}
+    sidecar_paths = {column: path for column, path in sidecar_paths.items() if os.path.exists(path)}
+    if not sidecar_paths:
+        print("まとめる予測結果がありませんでした。")
+        return
+
+    try:
+        df_to_save = _read_csv(output_file_path, list(sidecar_paths))
+    except FileNotFoundError:
+        df_to_save = None
+
+    for column, sidecar_path in sidecar_paths.items():
+        # 同じ行（論文とデータ論文の組）が複数回追記されている場合は、最後の予測結果を採用する
+        # DOIだけで重複を除くと、同じ論文が複数のデータ論文を引用している行が失われる
+        df_sidecar = _read_csv(sidecar_path, [column]).drop_duplicates(subset=_PREDICTION_BASE_COLUMNS, keep='last')
+        df_to_save = _merge_prediction_column(df_to_save, df_sidecar, column)
+
+    df_to_save.to_csv(output_file_path, index=False, encoding='utf-8-sig')
+    for sidecar_path in sidecar_paths.values():
+        os.remove(sidecar_path)
+
+    print(f"\n処理完了。LLMの予測結果を '{output_file_path}' に保存しました。")
+    for column in sidecar_paths:
+        print(f"\n--- 保存された結果の内訳 ({column}) ---")
+        print(df_to_save[column].value_counts())
+
 def retry_llm_predictions(
     input_samples_csv: str = OUTPUT_FILE_SAMPLES_WITH_TEXT,
     input_predictions_csv: str = OUTPUT_FILE_PREDICTION_LLM,
@@ -185,7 +601,9 @@ def retry_llm_predictions(
     model_name: str = GEMINI_MODEL_NAME,
     api_key: str = GEMINI_API_KEY,
     sleep_time: float = 1.5,
-    timeout: int = 180
+    timeout: int = 180,
+    max_workers: int = 5,
+    df_samples: pd.DataFrame = None
 ):
     """
     LLM予測で失敗した（-1）論文の予測を再試行します。
@@ -200,16 +618,19 @@ def retry_llm_predictions(
         api_key (str): Gemini APIキー。
         sleep_time (float): APIリクエスト間の待機時間（秒）。
         timeout (int): APIリクエストのタイムアウト時間（秒）。
+        max_workers (int): 並列リクエストに使用するスレッド数。
+        df_samples (pd.DataFrame): 読み込み済みの論文データ。指定した場合はinput_samples_csvを読み込まない。
     """
     try:
-        df_samples = pd.read_csv(input_samples_csv)
-        df_predictions = pd.read_csv(input_predictions_csv)
+        if df_samples is None:
+            df_samples = _read_csv(input_samples_csv)
+        df_predictions = _read_csv(input_predictions_csv, [column_to_retry])
 
         if column_to_retry not in df_predictions.columns:
             print(f"エラー: '{column_to_retry}' カラムが予測結果ファイルに見つかりません。再試行をスキップします。")
             return
 
-        retry_dois = df_predictions[df_predictions[column_to_retry] == -1]['citing_paper_doi']
+        retry_dois = df_predictions[df_predictions[column_to_retry].eq(-1).fillna(False)]['citing_paper_doi']
         df_to_retry = df_samples[df_samples['citing_paper_doi'].isin(retry_dois)].copy()
         
         if df_to_retry.empty:
@@ -228,7 +649,8 @@ def retry_llm_predictions(
             model_name=model_name,
             api_key=api_key,
             sleep_time=sleep_time,
-            timeout=timeout
+            timeout=timeout,
+            max_workers=max_workers
         )
 
         # 元の予測結果を更新
@@ -254,7 +676,7 @@ def main_llm_abstract_prediction():
         configure_gemini_api()
         prompt_template = load_prompt_template(PROMPT_FILE_ZERO_SHOT_ABSTRACT)
         
-        df_to_process = pd.read_csv(OUTPUT_FILE_SAMPLES_WITH_TEXT)
+        df_to_process = _read_csv(OUTPUT_FILE_SAMPLES_WITH_TEXT)
         df_to_process.dropna(subset=['abstract'], inplace=True) # アブストラクトが空の行は除外
         
         df_predictions = run_llm_prediction(
@@ -283,7 +705,7 @@ def main_llm_fulltext_prediction(
         configure_gemini_api()
         prompt_template = load_prompt_template(prompt_file_path)
         
-        df_to_process = pd.read_csv(OUTPUT_FILE_SAMPLES_WITH_TEXT)
+        df_to_process = _read_csv(OUTPUT_FILE_SAMPLES_WITH_TEXT)
         df_to_process.dropna(subset=['full_text'], inplace=True) # フルテキストが空の行は除外
         df_to_process.drop_duplicates(subset=['citing_paper_doi'], inplace=True, keep='first')
         df_to_process.reset_index(drop=True, inplace=True)
@@ -1,4 +1,8 @@
-import xml.etree.ElementTree as ET
+# lxmlがインストールされていれば、C実装のパーサーとXPathエンジンを持つlxmlを使用する
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 import re
 
 # XMLの名前空間の定義
@@ -10,6 +14,36 @@ NAMESPACES = {
     'xocs': 'http://www.elsevier.com/xml/xocs/dtd'
 }
 
+# 名前空間の接頭辞に対応するClark記法（{uri}）の文字列。タグ名はモジュールの読み込み時に1回だけ組み立てる
+_T = {prefix: f"{{{uri}}}" for prefix, uri in NAMESPACES.items()}
+_ARTICLE_TAG = f"{_T['ja']}article"
+_HEAD_TAG = f"{_T['ja']}head"
+_BODY_TAG = f"{_T['ja']}body"
+_ABSTRACT_TAG = f"{_T['ce']}abstract"
+_ABSTRACT_SEC_TAG = f"{_T['ce']}abstract-sec"
+_SIMPLE_PARA_TAG = f"{_T['ce']}simple-para"
+_SECTIONS_TAG = f"{_T['ce']}sections"
+_SECTION_TAG = f"{_T['ce']}section"
+_SECTION_TITLE_TAG = f"{_T['ce']}section-title"
+_PARA_TAG = f"{_T['ce']}para"
+_FORMULA_TAG = f"{_T['ce']}formula"
+_DISPLAY_TAG = f"{_T['ce']}display"
+_COREDATA_TAG = f"{_T['core']}coredata"
+_DESCRIPTION_TAG = f"{_T['dc']}description"
+_DOC_TAG = f"{_T['xocs']}doc"
+_RAWTEXT_TAG = f"{_T['xocs']}rawtext"
+
+def _find_child(root: ET.Element, parent_tag: str, child_tag: str) -> ET.Element or None:
+    """
+    rootとその子孫からparent_tagの要素をたどり、その直下で最初に見つかったchild_tagの要素を返す。
+    パス式を解析せず、iter()とfind()にClark記法のタグを渡して探索する。
+    """
+    for parent in root.iter(parent_tag):
+        child = parent.find(child_tag)
+        if child is not None:
+            return child
+    return None
+
 def extract_abstract_robustly(root: ET.Element) -> str or None:
     """
     XMLのroot要素から、判明した全てのパターンを試してアブストラクトを抽出する。
@@ -22,7 +56,13 @@ def extract_abstract_robustly(root: ET.Element) -> str or None:
     """
     try:
         # パターン1: 本文内の詳細なアブストラクト (`<ce:abstract class="author">`)
-        paras = root.findall('.//ja:article/ja:head/ce:abstract[@class="author"]//ce:simple-para', NAMESPACES)
+        paras = [
+            para
+            for article in root.iter(_ARTICLE_TAG)
+            for head in article.findall(_HEAD_TAG)
+            for abstract in head.findall(_ABSTRACT_TAG) if abstract.get('class') == 'author'
+            for para in abstract.iter(_SIMPLE_PARA_TAG)
+        ]
         if paras:
             text = ' '.join(p.text.strip() for p in paras if p.text)
             if text: return ' '.join(text.split())
@@ -30,7 +70,12 @@ def extract_abstract_robustly(root: ET.Element) -> str or None:
         # パターン2: 一般的なアブストラクト (`<ce:abstract>`)
         # パターン1が成功しなかった場合のみ試行
         if not paras: # Check if paras from pattern 1 was empty
-            paras = root.findall('.//ce:abstract/ce:abstract-sec//ce:simple-para', NAMESPACES)
+            paras = [
+                para
+                for abstract in root.iter(_ABSTRACT_TAG)
+                for abstract_sec in abstract.findall(_ABSTRACT_SEC_TAG)
+                for para in abstract_sec.iter(_SIMPLE_PARA_TAG)
+            ]
             if paras:
                 text = ' '.join(p.text.strip() for p in paras if p.text)
                 if text: return ' '.join(text.split())
@@ -38,7 +83,7 @@ def extract_abstract_robustly(root: ET.Element) -> str or None:
         # パターン3: メタデータ内のアブストラクト (`<dc:description>`)
         # パターン1, 2が成功しなかった場合のみ試行
         if not paras: # Check if paras from pattern 2 was empty
-            description = root.find('.//core:coredata/dc:description', NAMESPACES)
+            description = _find_child(root, _COREDATA_TAG, _DESCRIPTION_TAG)
             if description is not None and description.text:
                 text = description.text.strip()
                 if text: return ' '.join(text.split())
@@ -47,6 +92,22 @@ def extract_abstract_robustly(root: ET.Element) -> str or None:
         return None
     return None
 
+# 全文テキストから除外するインライン要素（数式など）
+_EXCLUDED_INLINE_TAGS = (_FORMULA_TAG, _DISPLAY_TAG)
+
+def _iter_para_text(element: ET.Element):
+    """
+    itertext()と同様に要素内のテキストを文書順に返す。ただし除外対象の要素の中身は飛ばし、その後ろのテキスト（tail）は残す。
+    コメントなどタグ名が文字列でない要素の中身も返さない。
+    """
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _EXCLUDED_INLINE_TAGS:
+            yield from _iter_para_text(child)
+        if child.tail:
+            yield child.tail
+
 def extract_full_text_robustly(root: ET.Element) -> str or None:
     """
     XMLのroot要素から、図表や不要セクション、数式などを除いたクリーンな全文テキストを抽出する。
@@ -62,30 +123,22 @@ def extract_full_text_robustly(root: ET.Element) -> str or None:
         excluded_keywords = ['acknowledgement', 'references', 'bibliography', 'author contribution', 'competing interest', 'funding']
 
         # パターンA: 構造化された本文 (`<ja:body><ce:sections>`)
-        body_sections = root.find('.//ja:body/ce:sections', NAMESPACES)
+        body_sections = _find_child(root, _BODY_TAG, _SECTIONS_TAG)
         if body_sections is not None:
-            for section in body_sections.findall('.//ce:section', NAMESPACES):
-                title_tag = section.find('./ce:section-title', NAMESPACES)
+            for section in body_sections.iter(_SECTION_TAG):
+                title_tag = section.find(_SECTION_TITLE_TAG)
                 sec_title = title_tag.text.strip().lower() if title_tag is not None and title_tag.text else ''
                 
                 if not any(keyword in sec_title for keyword in excluded_keywords):
-                    for para in section.findall('./ce:para', NAMESPACES):
-                        para_text_parts = [para.text.strip()] if para.text else []
-                        for child in para:
-                            if child.tag not in [f'{{{NAMESPACES["ce"]}}}formula', f'{{{NAMESPACES["ce"]}}}display']:
-                                if child.tail: 
-                                    para_text_parts.append(child.tail.strip())
-                                # child.text も考慮に入れる
-                                if child.text:
-                                    para_text_parts.append(child.text.strip())
-                        
-                        clean_text = ' '.join(' '.join(part for part in para_text_parts if part).split())
+                    for para in section.findall(_PARA_TAG):
+                        # 段落内のテキストを文書順に集め、文字列の連結は最後に1回だけ行う
+                        clean_text = ' '.join(''.join(_iter_para_text(para)).split())
                         if clean_text: full_text_parts.append(clean_text)
             if full_text_parts:
                 return " ".join(full_text_parts)
 
         # パターンB: 非構造化テキスト (`<rawtext>`)
-        raw_text_element = root.find('.//xocs:doc/xocs:rawtext', NAMESPACES)
+        raw_text_element = _find_child(root, _DOC_TAG, _RAWTEXT_TAG)
         if raw_text_element is not None and raw_text_element.text:
             raw_text = raw_text_element.text
             return ' '.join(raw_text.split())
@@ -1,11 +1,41 @@
-import xml.etree.ElementTree as ET
+# lxmlがインストールされていれば、C実装のパーサーとXPathエンジンを持つlxmlを使用する
+try:
+    from lxml import etree as ET
+    # 使用しないIDテーブルの構築と実体参照の展開を行わず、大きなXMLファイルも読み込めるようにする
+    _ITERPARSE_OPTIONS = {'collect_ids': False, 'resolve_entities': False, 'huge_tree': True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _ITERPARSE_OPTIONS = {}
 import pandas as pd
 import os
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# pyarrowがインストールされていれば、特徴量CSVの書き込みに列単位で書き出すpyarrowを使用する
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
 # XMLの名前空間
 namespaces = {'ce': 'http://www.elsevier.com/xml/common/dtd', 'sb': 'http://www.elsevier.com/xml/common/struct-bib/dtd', 'ja': 'http://www.elsevier.com/xml/ja/dtd'}
 
+# 名前空間の接頭辞に対応するClark記法（{uri}）の文字列。タグ名はモジュールの読み込み時に1回だけ組み立て、
+# iter()やfind()に直接渡すことでパス式の解析を行わずに探索する
+_T = {prefix: f"{{{uri}}}" for prefix, uri in namespaces.items()}
+_BIB_REFERENCE_PATH = tuple(f"{_T['ce']}{name}" for name in ('bibliography', 'bibliography-sec', 'bib-reference'))
+_BIB_SEC_TAG = _BIB_REFERENCE_PATH[1]
+_BIB_REF_TAG = _BIB_REFERENCE_PATH[2]
+_SOURCE_TEXT_TAG = f"{_T['ce']}source-text"
+_SECTION_TAG = f"{_T['ce']}section"
+_SECTION_TITLE_TAG = f"{_T['ce']}section-title"
+_SECTIONS_TAG = f"{_T['ce']}sections"
+_PARA_TAG = f"{_T['ce']}para"
+_CROSS_REF_TAG = f"{_T['ce']}cross-ref"
+_BODY_TAG = f"{_T['ja']}body"
+
 def get_citation_map_et(root_element: ET.Element) -> dict:
     """
     参考文献リストから {ref_id: '文献情報'} の辞書を作成する。
@@ -17,34 +47,73 @@ def get_citation_map_et(root_element: ET.Element) -> dict:
         dict: 参考文献IDをキー、文献情報を値とする辞書。
     """
     citation_map = {}
-    references = root_element.findall('.//ce:bibliography/ce:bibliography-sec/ce:bib-reference', namespaces)
-    for ref in references:
-        ref_id = ref.get('id')
-        source_text_element = ref.find('.//ce:source-text', namespaces)
-        citation_text = source_text_element.text if source_text_element is not None else ''.join(ref.itertext())
-        if ref_id:
-            citation_map[ref_id] = citation_text.strip() if citation_text else 'N/A'
+    # パスの評価を行わず、C実装のiter()で参考文献セクションを1回だけたどり、その直下の参考文献を読み取る
+    for bibliography_sec in root_element.iter(_BIB_SEC_TAG):
+        for ref in bibliography_sec:
+            if ref.tag != _BIB_REF_TAG:
+                continue
+            ref_id = ref.get('id')
+            if ref_id:
+                citation_map[ref_id] = _citation_text(ref)
+    return citation_map
+
+def _citation_text(ref: ET.Element) -> str:
+    """参考文献要素から文献情報のテキストを取り出す。テキストがなければ'N/A'を返す。"""
+    source_text_element = next(ref.iter(_SOURCE_TEXT_TAG), None)
+    citation_text = source_text_element.text if source_text_element is not None else ''.join(ref.itertext())
+    return citation_text.strip() if citation_text else 'N/A'
+
+def get_citation_map_streaming(xml_path: str) -> dict:
+    """
+    XMLファイルを先頭から順に読み込み、参考文献リストから {ref_id: '文献情報'} の辞書を作成する。
+    ツリー全体を保持しないため、大きなXMLファイルでもメモリ使用量が小さく抑えられる。
+
+    Args:
+        xml_path (str): 解析対象のXMLファイルのパス。
+
+    Returns:
+        dict: 参考文献IDをキー、文献情報を値とする辞書。
+    """
+    citation_map, _ = _stream_citations_and_sections(xml_path)
     return citation_map
 
-def find_target_ref_id(citation_map: dict, target_title: str) -> str or None:
+def build_citation_index(citation_map: dict) -> list:
+    """
+    参考文献マップから、文献情報を小文字化した (ref_id, 文献情報) のリストを作成する。
+    同じ論文に対して複数のデータ論文タイトルを検索する場合は、1回だけ作成して使い回す。
+
+    Args:
+        citation_map (dict): 参考文献IDと文献情報の辞書。
+
+    Returns:
+        list: 参考文献IDと小文字化した文献情報のタプルのリスト（参考文献リストの順序を保持）。
+    """
+    return [(ref_id, full_citation.lower()) for ref_id, full_citation in citation_map.items()]
+
+def find_target_ref_id(citation_map: dict, target_title: str, citation_index: list = None) -> str or None:
     """
     参考文献マップとデータ論文タイトルから、対応するRef IDを見つける。
 
     Args:
         citation_map (dict): 参考文献IDと文献情報の辞書。
         target_title (str): 検索対象のデータ論文タイトル。
+        citation_index (list): build_citation_indexで作成済みのインデックス。指定した場合はcitation_mapの代わりに使用する。
 
     Returns:
         str or None: 見つかったRef ID、または見つからなかった場合はNone。
     """
-    for ref_id, full_citation in citation_map.items():
-        if target_title.lower() in full_citation.lower():
+    if citation_index is None:
+        citation_index = build_citation_index(citation_map)
+    target_title_lower = target_title.lower()
+    for ref_id, full_citation_lower in citation_index:
+        if target_title_lower in full_citation_lower:
             return ref_id
     return None
 
 def parse_sections_recursive(element: ET.Element) -> list:
     """
-    XML要素から、全セクションのタイトルと、各セクション内の引用IDリストを抽出する（再帰的）。
+    XML要素から、全セクションのタイトルと、各セクション内の引用IDリストを抽出する（入れ子のセクションも含む）。
+    関数の再帰呼び出しは行わず、スタックを使って文書内の出現順にセクションをたどる。
 
     Args:
         element (ET.Element): 解析対象のXML要素。
@@ -53,24 +122,96 @@ def parse_sections_recursive(element: ET.Element) -> list:
         list: 各セクションのタイトルと引用IDリストを含む辞書のリスト。
     """
     sections_data = []
-    for section in element.findall('./ce:section', namespaces):
-        title_tag = section.find('./ce:section-title', namespaces)
-        sec_title = title_tag.text.strip() if title_tag is not None and title_tag.text else 'No Title'
-        
-        citations_in_section = []
-        paragraphs = section.findall('./ce:para', namespaces)
-        for p in paragraphs:
-            cross_refs = p.findall('.//ce:cross-ref', namespaces)
-            for xref in cross_refs:
-                if xref.get('refid'):
-                    ref_ids = xref.get('refid').split()
-                    for ref_id in ref_ids:
-                        citations_in_section.append(ref_id)
-                        
-        sections_data.append({'title': sec_title, 'citations': citations_in_section})
-        sections_data.extend(parse_sections_recursive(section)) # 再帰呼び出し
+    # 先に出現するセクションから取り出せるよう、逆順に積む
+    stack = element.findall(_SECTION_TAG)[::-1]
+    while stack:
+        section = stack.pop()
+        sections_data.append(_section_record(section))
+        stack.extend(section.findall(_SECTION_TAG)[::-1])
     return sections_data
 
+def _section_record(section: ET.Element) -> dict:
+    """セクション要素から、タイトルと直下の段落に含まれる引用IDリストを取り出す。"""
+    title_tag = section.find(_SECTION_TITLE_TAG)
+    sec_title = title_tag.text.strip() if title_tag is not None and title_tag.text else 'No Title'
+
+    citations_in_section = []
+    for p in section.findall(_PARA_TAG):
+        for xref in p.iter(_CROSS_REF_TAG):
+            if xref.get('refid'):
+                citations_in_section.extend(xref.get('refid').split())
+
+    return {'title': sec_title, 'citations': citations_in_section}
+
+def _is_body_section(open_tags: list) -> bool:
+    """開いている要素のタグの並びが ja:body/ce:sections/ce:section(/ce:section...) であるかを判定する。"""
+    i = len(open_tags) - 1
+    while i >= 0 and open_tags[i] == _SECTION_TAG:
+        i -= 1
+    return i < len(open_tags) - 1 and i >= 1 and open_tags[i] == _SECTIONS_TAG and open_tags[i - 1] == _BODY_TAG
+
+def _stream_citations_and_sections(xml_path: str) -> tuple:
+    """
+    XMLファイルを1回だけ先頭から読み込み、参考文献の辞書と本文セクションの情報を同時に抽出する。
+    処理を終えた要素は順次クリアし、ツリー全体をメモリに保持しない。
+
+    Args:
+        xml_path (str): 解析対象のXMLファイルのパス。
+
+    Returns:
+        tuple: (参考文献IDと文献情報の辞書, parse_sections_recursiveと同じ順序のセクション情報のリスト)
+    """
+    citation_map = {}
+    section_order = {}
+    section_count = 0
+    sections_data = []
+    open_tags = []
+
+    for event, elem in ET.iterparse(xml_path, events=('start', 'end'), **_ITERPARSE_OPTIONS):
+        if event == 'start':
+            open_tags.append(elem.tag)
+            if elem.tag == _SECTION_TAG and _is_body_section(open_tags):
+                # 入れ子のセクションは内側から終了するため、出現順を記録しておき最後に並べ直す
+                section_order[elem] = section_count
+                section_count += 1
+            continue
+
+        if elem.tag == _BIB_REF_TAG and tuple(open_tags[-3:]) == _BIB_REFERENCE_PATH:
+            ref_id = elem.get('id')
+            if ref_id:
+                citation_map[ref_id] = _citation_text(elem)
+            elem.clear()
+            # lxmlでは処理済みの兄弟要素も親から取り除き、メモリを解放する
+            if hasattr(elem, 'getprevious'):
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        elif elem in section_order:
+            # 外側のセクションは直下の段落だけを見るため、内側のセクションは処理後にクリアしてよい
+            sections_data.append((section_order.pop(elem), _section_record(elem)))
+            elem.clear()
+        open_tags.pop()
+
+    sections_data.sort(key=lambda item: item[0])
+    return citation_map, [record for _, record in sections_data]
+
+@lru_cache(maxsize=512)
+def _load_document(xml_path: str, mtime: float) -> tuple:
+    """
+    XMLファイルを読み込み、データ論文のタイトルに依存しない解析結果を返す（(パス, 更新日時) ごとにキャッシュ）。
+    1つの論文が複数のデータ論文を引用している場合に、同じXMLを何度も読み込まないようにする。
+
+    Args:
+        xml_path (str): 解析対象のXMLファイルのパス。
+        mtime (float): ファイルの更新日時。ファイルが更新された場合にキャッシュを使わないためのキー。
+
+    Returns:
+        tuple: (参考文献IDと文献情報の辞書, build_citation_indexのインデックス, セクション情報のタプル)
+               キャッシュされた値を共有するため、呼び出し側で変更しないこと。
+    """
+    # ツリー全体を構築せず、1回の読み込みで参考文献と本文セクションを抽出する
+    citation_map, sections_data = _stream_citations_and_sections(xml_path)
+    return citation_map, tuple(build_citation_index(citation_map)), tuple(sections_data)
+
 def analyze_single_xml(xml_path: str, target_data_paper_title: str) -> tuple:
     """
     1つのXMLファイルを解析し、特徴量と判定結果を抽出するメイン関数。
@@ -84,19 +225,11 @@ def analyze_single_xml(xml_path: str, target_data_paper_title: str) -> tuple:
                エラーの場合は (-1, ['parsing_error'], -1, -1)。
     """
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        
-        citation_map = get_citation_map_et(root)
-        target_ref_id = find_target_ref_id(citation_map, target_data_paper_title)
+        # 解析結果はファイルの更新日時ごとにキャッシュされ、同じXMLを別のタイトルで解析する場合は再読み込みしない
+        citation_map, citation_index, all_sections_data = _load_document(xml_path, os.path.getmtime(xml_path))
+        target_ref_id = find_target_ref_id(citation_map, target_data_paper_title, citation_index=citation_index)
         if not target_ref_id:
             return 0, [], 0, 0
-
-        top_level_sections = root.find('.//ja:body/ce:sections', namespaces)
-        if not top_level_sections:
-            return 0, [], 0, 0
-        
-        all_sections_data = parse_sections_recursive(top_level_sections)
         
         mention_count = 0
         mentioned_sections = []
@@ -120,11 +253,105 @@ def analyze_single_xml(xml_path: str, target_data_paper_title: str) -> tuple:
     except Exception:
         return -1, ['parsing_error'], -1, -1
 
+def _analyze_xml_titles(xml_path: str, target_titles: list) -> list:
+    """
+    1つのXMLファイルを、複数のデータ論文のタイトルについてまとめて解析する。
+    同じプロセス内で続けて解析するため、XMLの読み込み結果（_load_document）が使い回される。
+
+    Args:
+        xml_path (str): 解析対象のXMLファイルのパス。
+        target_titles (list): データ論文のタイトルのリスト。
+
+    Returns:
+        list: target_titlesと同じ順序のanalyze_single_xmlの結果のリスト。
+    """
+    return [analyze_single_xml(xml_path, target_title) for target_title in target_titles]
+
+# 1つのディレクトリ内の対象XMLがこの件数を超えたら、存在確認をディレクトリの走査に切り替える
+_SCANDIR_THRESHOLD = 32
+# 走査するディレクトリのエントリ数の上限（対象XMLの件数に対する倍率）。これを超える大きなディレクトリは走査を打ち切る
+_SCANDIR_MAX_ENTRIES_PER_TARGET = 4
+
+def _scan_directory(directory: str, max_entries: int = None) -> set or None:
+    """
+    ディレクトリを1回走査し、含まれるファイルのパス（正規化済み）の集合を返す。
+    ディレクトリが存在しない場合は空の集合、エントリ数がmax_entriesを超えた場合はNoneを返す。
+    """
+    existing_files = set()
+    try:
+        with os.scandir(directory or '.') as entries:
+            for entry_count, entry in enumerate(entries, start=1):
+                if max_entries is not None and entry_count > max_entries:
+                    return None
+                if entry.is_file():
+                    existing_files.add(os.path.normpath(os.path.join(directory, entry.name)))
+    except OSError:
+        # ディレクトリが存在しない場合、その中のXMLは全て見つからなかったものとして扱う
+        pass
+    return existing_files
+
+def _make_file_exists(xml_paths: list):
+    """
+    XMLのパスの存在を確認する関数を返す。
+    対象XMLが多いディレクトリは1回だけ走査して結果を使い回し、それ以外はos.path.existsで確認する。
+    走査が割に合わない（対象XMLの件数に比べてエントリが多すぎる）ディレクトリもos.path.existsで確認する。
+
+    Args:
+        xml_paths (list): 存在を確認する予定のXMLファイルのパスのリスト。
+
+    Returns:
+        callable: パスを受け取り、ファイルが存在すればTrueを返す関数。
+    """
+    paths_by_directory = {}
+    for xml_path in set(xml_paths):
+        normalized_path = os.path.normpath(xml_path)
+        paths_by_directory.setdefault(os.path.dirname(normalized_path), set()).add(normalized_path)
+
+    scanned_directories = set()
+    existing_files = set()
+    for directory, paths in paths_by_directory.items():
+        if len(paths) <= _SCANDIR_THRESHOLD:
+            continue
+        directory_files = _scan_directory(directory, max_entries=len(paths) * _SCANDIR_MAX_ENTRIES_PER_TARGET)
+        if directory_files is not None:
+            scanned_directories.add(directory)
+            existing_files |= directory_files
+
+    def file_exists(xml_path: str) -> bool:
+        normalized_path = os.path.normpath(xml_path)
+        if os.path.dirname(normalized_path) in scanned_directories:
+            return normalized_path in existing_files
+        return os.path.exists(xml_path)
+
+    return file_exists
+
+def _write_features_csv(df: pd.DataFrame, output_file_path: str):
+    """
+    特徴量のDataFrameをUTF-8（BOM付き）のCSVとして保存する。
+    pyarrowがあればpyarrowで書き込み、なければpandasのto_csvを使用する。
+    pyarrowは文字列を全て引用符で囲むためファイルの内容はto_csvと異なるが、pd.read_csvで読み込んだ結果は同じになる。
+
+    Args:
+        df (pd.DataFrame): 保存する特徴量のDataFrame。
+        output_file_path (str): 保存先のCSVファイルのパス。
+    """
+    if pa is None:
+        df.to_csv(output_file_path, index=False, encoding='utf-8-sig')
+        return
+
+    # pyarrowはリストを含む列をCSVに書き込めないため、to_csvと同じ文字列表現に変換しておく
+    df_to_write = df.assign(mentioned_sections=df['mentioned_sections'].map(str))
+    table = pa.Table.from_pandas(df_to_write, preserve_index=False)
+    with open(output_file_path, 'wb') as f:
+        f.write('\ufeff'.encode('utf-8'))
+        pa_csv.write_csv(table, f)
+
 def process_xml_for_features(
     df_targets: pd.DataFrame, 
     df_master: pd.DataFrame, 
     output_dir: str, 
-    output_file_name: str
+    output_file_name: str,
+    max_workers: int = None
 ) -> pd.DataFrame:
     """
     アノテーション対象の論文リストとマスターリストをマージし、XMLを解析して特徴量を抽出します。
@@ -134,6 +361,7 @@ def process_xml_for_features(
         df_master (pd.DataFrame): 全ての引用論文のマスターリスト（パス情報を含む）。
         output_dir (str): 結果を保存するディレクトリ。
         output_file_name (str): 結果を保存するファイル名。
+        max_workers (int): XMLの解析に使用するプロセス数。Noneの場合はCPUのコア数。解析対象のXMLファイルが1件以下の場合はプロセスを起動しない。
 
     Returns:
         pd.DataFrame: 特徴量が追加されたDataFrame。
@@ -143,26 +371,43 @@ def process_xml_for_features(
     merge_keys = ['citing_paper_eid', 'citing_paper_doi', 'citing_paper_title', 'cited_data_paper_title']
     df_to_process = pd.merge(df_targets, df_master.drop_duplicates(subset=merge_keys), on=merge_keys, how='left')
     
-    results_list = []
     print(f"アノテーション対象 {len(df_to_process)} 件のXMLを解析します...")
-    
-    for index, row in tqdm(df_to_process.iterrows(), total=len(df_to_process), desc="特徴量抽出中"):
-        xml_path = row['fulltext_xml_path']
-        target_title = row['cited_data_paper_title']
-        
-        if pd.notna(xml_path) and os.path.exists(xml_path):
-            count, sections, pred1, pred2 = analyze_single_xml(xml_path, target_title)
-        else:
-            count, sections, pred1, pred2 = -1, ['file_not_found'], -1, -1
-
-        result_row = row.to_dict()
-        result_row['mention_count'] = count
-        result_row['mentioned_sections'] = sections
-        result_row['prediction_rule1'] = pred1
-        result_row['prediction_rule2'] = pred2
-        results_list.append(result_row)
-
-    df_final = pd.DataFrame(results_list)
+
+    # XMLファイルが存在する行だけを解析対象とする
+    # 対象XMLが多いディレクトリは、ファイルごとにstatを呼ばずに1回だけ走査して存在を確認する
+    xml_path_list = [xml_path for xml_path in df_to_process['fulltext_xml_path'] if pd.notna(xml_path)]
+    file_exists = _make_file_exists(xml_path_list)
+    has_xml = [pd.notna(xml_path) and file_exists(xml_path) for xml_path in df_to_process['fulltext_xml_path']]
+    df_tasks = df_to_process.loc[has_xml]
+
+    # 同じXMLを参照する行をまとめ、ファイルごとに1つのタスクとして解析する（各XMLの読み込みは1回で済む）
+    titles_by_path = {}
+    for xml_path, target_title in zip(df_tasks['fulltext_xml_path'], df_tasks['cited_data_paper_title']):
+        titles_by_path.setdefault(xml_path, []).append(target_title)
+    xml_paths = list(titles_by_path)
+    title_groups = list(titles_by_path.values())
+
+    # XMLの解析はCPUバウンドなため、複数のプロセスで並列に実行する
+    workers = min(max_workers or os.cpu_count() or 1, len(xml_paths))
+    if workers > 1:
+        # 小さなタスクを1件ずつプロセス間でやり取りしないよう、ある程度まとめて渡す
+        chunksize = max(1, len(xml_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            grouped_results = list(tqdm(executor.map(_analyze_xml_titles, xml_paths, title_groups, chunksize=chunksize), total=len(xml_paths), desc="特徴量抽出中"))
+    else:
+        grouped_results = [_analyze_xml_titles(xml_path, target_titles) for xml_path, target_titles in tqdm(zip(xml_paths, title_groups), total=len(xml_paths), desc="特徴量抽出中")]
+
+    # ファイルごとの解析結果を元の行の順序に戻す
+    results_by_path = {xml_path: iter(results) for xml_path, results in zip(xml_paths, grouped_results)}
+    analysis_results = [next(results_by_path[xml_path]) for xml_path in df_tasks['fulltext_xml_path']]
+
+    # 行ごとに辞書を組み立てず、解析結果を列としてまとめて追加する
+    feature_columns = ['mention_count', 'mentioned_sections', 'prediction_rule1', 'prediction_rule2']
+    # 行ごとに別のリストを持たせる（同じリストを共有すると、1行の変更が全ての行に反映されてしまう）
+    df_features = pd.DataFrame([(-1, ['file_not_found'], -1, -1) for _ in range(len(df_to_process))], index=df_to_process.index, columns=feature_columns)
+    if analysis_results:
+        df_features.loc[df_tasks.index] = pd.DataFrame(analysis_results, index=df_tasks.index, columns=feature_columns)
+    df_final = pd.concat([df_to_process, df_features], axis=1)
     
     columns_to_save = [
         'citing_paper_eid', 
@@ -177,7 +422,7 @@ def process_xml_for_features(
     df_to_save = df_final[columns_to_save]
     
     os.makedirs(output_dir, exist_ok=True)
-    df_to_save.to_csv(output_file_path, index=False, encoding='utf-8-sig')
+    _write_features_csv(df_to_save, output_file_path)
 
     print(f"\n処理完了。特徴量抽出結果を '{output_file_path}' に保存しました。")
     print("\n--- 保存されたデータの出力例（先頭5件）---")
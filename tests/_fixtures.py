@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+import pandas as pd
+
+
+@lru_cache(maxsize=None)
+def eval_fixtures() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    評価系テストで共有するダミーの正解データ、特徴量、LLM予測結果を返します。
+    同じインスタンスが使い回されるため、変更する場合は呼び出し側で .copy() してください。
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: (正解データ, 特徴量, LLM予測結果) のDataFrame。
+    """
+    dummy_gt = pd.DataFrame({
+        'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
+        'is_data_used_gt': [1, 0, 1, 0, 1]
+    })
+
+    dummy_features = pd.DataFrame({
+        'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
+        'prediction_rule1': [1, 0, 1, 1, 0],
+        'prediction_rule2': [1, 0, 0, 1, 1]
+    })
+
+    dummy_llm = pd.DataFrame({
+        'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
+        'prediction_rule3_abstract': [1, 0, 1, 0, 1],
+        'prediction_rule3_fulltext': [1, 0, 0, 0, 1],
+        'prediction_rule3_fulltext_few_shot': [1, 0, 1, 0, 1],
+        'prediction_rule3_gemini-2_5-flash': [1, 0, 1, 0, 1],
+        'prediction_rule3_gemini-2_5-flash_zeroshot': [1, 0, 0, 0, 1]
+    })
+
+    return dummy_gt, dummy_features, dummy_llm
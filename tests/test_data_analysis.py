@@ -11,6 +11,8 @@ from src.data_analysis import (
 )
 from src.config import OUTPUT_FILE_DATA_PAPERS
 
+_EMPTY_DF = pd.DataFrame()
+
 class TestDataAnalysis(unittest.TestCase):
 
     def setUp(self):
@@ -27,7 +29,7 @@ class TestDataAnalysis(unittest.TestCase):
         self.df_dummy.to_csv(self.test_csv_path, index=False)
 
         self.empty_csv_path = "empty_data_papers.csv"
-        pd.DataFrame().to_csv(self.empty_csv_path, index=False)
+        _EMPTY_DF.to_csv(self.empty_csv_path, index=False)
 
     def tearDown(self):
         # テスト用ファイルを削除
@@ -62,14 +64,19 @@ class TestDataAnalysis(unittest.TestCase):
         df_filtered = filter_by_citation_count(df, min_citations=2) # 5, 15, 60, 200
         df_categorized = categorize_citations(df_filtered)
         self.assertIn('citation_category', df_categorized.columns)
-        self.assertEqual(df_categorized.loc[df_categorized['citedby_count'] == 5, 'citation_category'].iloc[0], '2-10 (Low)')
-        self.assertEqual(df_categorized.loc[df_categorized['citedby_count'] == 15, 'citation_category'].iloc[0], '11-50 (Medium)')
-        self.assertEqual(df_categorized.loc[df_categorized['citedby_count'] == 60, 'citation_category'].iloc[0], '51-150 (High)')
-        self.assertEqual(df_categorized.loc[df_categorized['citedby_count'] == 200, 'citation_category'].iloc[0], '151+ (Top Tier)')
+        category_by_count = df_categorized.set_index('citedby_count')['citation_category'].to_dict()
+        expected_categories = [
+            (5, '2-10 (Low)'),
+            (15, '11-50 (Medium)'),
+            (60, '51-150 (High)'),
+            (200, '151+ (Top Tier)')
+        ]
+        for citedby_count, expected in expected_categories:
+            with self.subTest(citedby_count=citedby_count):
+                self.assertEqual(category_by_count[citedby_count], expected)
 
     def test_categorize_citations_empty_df(self):
-        df = pd.DataFrame()
-        df_categorized = categorize_citations(df)
+        df_categorized = categorize_citations(_EMPTY_DF)
         self.assertTrue(df_categorized.empty)
 
 if __name__ == '__main__':
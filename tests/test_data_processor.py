@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 import os
+import tempfile
 import xml.etree.ElementTree as ET
 from unittest.mock import patch, MagicMock
 
@@ -13,12 +14,28 @@ from src.config import (
 )
 from src.text_extractor import NAMESPACES # For dummy XML content
 
+# ダミーXMLの内容はテスト間で不変なので、モジュール読み込み時に一度だけ組み立てる
+_DUMMY_XML_1 = f"""
+<ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
+    <ja:head><ce:abstract><ce:abstract-sec><ce:simple-para>Abstract 1 content.</ce:simple-para></ce:abstract-sec></ce:abstract></ja:head>
+    <ja:body><ce:sections><ce:section><ce:section-title>Intro</ce:section-title><ce:para>Full text 1 content.</ce:para></ce:section></ce:sections></ja:body>
+</ja:article>
+"""
+_DUMMY_XML_2 = f"""
+<ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
+    <ja:head><ce:abstract><ce:abstract-sec><ce:simple-para>Abstract 2 content.</ce:simple-para></ce:abstract-sec></ce:abstract></ja:head>
+    <ja:body><ce:sections><ce:section><ce:section-title>Intro</ce:section-title><ce:para>Full text 2 content.</ce:para></ce:section></ce:sections></ja:body>
+</ja:article>
+"""
+
 class TestDataProcessor(unittest.TestCase):
 
     def setUp(self):
-        self.test_annotation_list_csv = "test_annotation_target_list.csv"
-        self.test_master_list_csv = "test_citing_papers_with_paths.csv"
-        self.test_output_dir = "test_processed_data"
+        self._td = tempfile.TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+        self.test_annotation_list_csv = os.path.join(self._td.name, "test_annotation_target_list.csv")
+        self.test_master_list_csv = os.path.join(self._td.name, "test_citing_papers_with_paths.csv")
+        self.test_output_dir = os.path.join(self._td.name, "test_processed_data")
         self.test_output_file = os.path.join(self.test_output_dir, "test_samples_with_text.csv")
         os.makedirs(self.test_output_dir, exist_ok=True)
 
@@ -26,22 +43,10 @@ class TestDataProcessor(unittest.TestCase):
         self.dummy_xml_path_1 = os.path.join(self.test_output_dir, "dummy_article_1.xml")
         self.dummy_xml_path_2 = os.path.join(self.test_output_dir, "dummy_article_2.xml")
 
-        dummy_xml_content_1 = f"""
-        <ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
-            <ja:head><ce:abstract><ce:abstract-sec><ce:simple-para>Abstract 1 content.</ce:simple-para></ce:abstract-sec></ce:abstract></ja:head>
-            <ja:body><ce:sections><ce:section><ce:section-title>Intro</ce:section-title><ce:para>Full text 1 content.</ce:para></ce:section></ce:sections></ja:body>
-        </ja:article>
-        """
-        dummy_xml_content_2 = f"""
-        <ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
-            <ja:head><ce:abstract><ce:abstract-sec><ce:simple-para>Abstract 2 content.</ce:simple-para></ce:abstract-sec></ce:abstract></ja:head>
-            <ja:body><ce:sections><ce:section><ce:section-title>Intro</ce:section-title><ce:para>Full text 2 content.</ce:para></ce:section></ce:sections></ja:body>
-        </ja:article>
-        """
         with open(self.dummy_xml_path_1, "w", encoding="utf-8") as f:
-            f.write(dummy_xml_content_1)
+            f.write(_DUMMY_XML_1)
         with open(self.dummy_xml_path_2, "w", encoding="utf-8") as f:
-            f.write(dummy_xml_content_2)
+            f.write(_DUMMY_XML_2)
 
         # ダミーCSVデータ
         dummy_targets = {
@@ -59,20 +64,6 @@ class TestDataProcessor(unittest.TestCase):
         }
         pd.DataFrame(dummy_master).to_csv(self.test_master_list_csv, index=False)
 
-    def tearDown(self):
-        if os.path.exists(self.test_annotation_list_csv):
-            os.remove(self.test_annotation_list_csv)
-        if os.path.exists(self.test_master_list_csv):
-            os.remove(self.test_master_list_csv)
-        if os.path.exists(self.dummy_xml_path_1):
-            os.remove(self.dummy_xml_path_1)
-        if os.path.exists(self.dummy_xml_path_2):
-            os.remove(self.dummy_xml_path_2)
-        if os.path.exists(self.test_output_file):
-            os.remove(self.test_output_file)
-        if os.path.exists(self.test_output_dir):
-            os.rmdir(self.test_output_dir)
-
     @patch('src.text_extractor.extract_abstract_robustly')
     @patch('src.text_extractor.extract_full_text_robustly')
     @patch('os.path.exists') # For xml_path existence checks
@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 import os
+import tempfile
 from unittest.mock import patch, MagicMock
 
 from src.data_verification import (
@@ -10,11 +11,15 @@ from src.data_verification import (
 )
 from src.config import OUTPUT_FILE_CITING_PAPERS_WITH_PATHS
 
+_EMPTY_DF = pd.DataFrame()
+
 class TestDataVerification(unittest.TestCase):
 
     def setUp(self):
-        self.test_results_csv = "test_citing_papers_with_paths.csv"
-        self.test_xml_dir = "test_xml_files"
+        self._td = tempfile.TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+        self.test_results_csv = os.path.join(self._td.name, "test_citing_papers_with_paths.csv")
+        self.test_xml_dir = os.path.join(self._td.name, "test_xml_files")
         os.makedirs(self.test_xml_dir, exist_ok=True)
 
         # ダミーのXMLファイルを作成
@@ -36,16 +41,6 @@ class TestDataVerification(unittest.TestCase):
         self.df_dummy = pd.DataFrame(self.dummy_data)
         self.df_dummy.to_csv(self.test_results_csv, index=False)
 
-    def tearDown(self):
-        if os.path.exists(self.test_results_csv):
-            os.remove(self.test_results_csv)
-        if os.path.exists(os.path.join(self.test_xml_dir, "doi1.xml")):
-            os.remove(os.path.join(self.test_xml_dir, "doi1.xml"))
-        if os.path.exists(os.path.join(self.test_xml_dir, "doi3.xml")):
-            os.remove(os.path.join(self.test_xml_dir, "doi3.xml"))
-        if os.path.exists(self.test_xml_dir):
-            os.rmdir(self.test_xml_dir)
-
     def test_load_citing_papers_results_success(self):
         df = load_citing_papers_results(self.test_results_csv)
         self.assertFalse(df.empty)
@@ -89,8 +84,7 @@ class TestDataVerification(unittest.TestCase):
         mock_print.assert_any_call(unittest.mock.ANY) # 警告メッセージが出力されることを確認
 
     def test_verify_xml_file_existence_empty_df(self):
-        df = pd.DataFrame()
-        df_verified = verify_xml_file_existence(df)
+        df_verified = verify_xml_file_existence(_EMPTY_DF)
         self.assertTrue(df_verified.empty)
 
 if __name__ == '__main__':
@@ -1,9 +1,11 @@
 import unittest
+import numpy as np
 import pandas as pd
 import os
+import tempfile
 from unittest.mock import patch, MagicMock
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 
+from tests._fixtures import eval_fixtures
 from src.evaluation import (
     load_and_merge_evaluation_data,
     generate_hybrid_predictions,
@@ -17,52 +19,43 @@ from src.config import (
     TABLES_DIR
 )
 
+# Rule 1 の期待値は正解ラベルと予測の配列から numpy で一度だけ計算しておく
+_DUMMY_GT, _DUMMY_FEATURES, _DUMMY_LLM = eval_fixtures()
+_GT = _DUMMY_GT['is_data_used_gt'].to_numpy()
+_RULE1 = _DUMMY_FEATURES['prediction_rule1'].to_numpy()
+_RULE1_TP = int(((_GT == 1) & (_RULE1 == 1)).sum())
+_RULE1_TN = int(((_GT == 0) & (_RULE1 == 0)).sum())
+_RULE1_FP = int(((_GT == 0) & (_RULE1 == 1)).sum())
+_RULE1_FN = int(((_GT == 1) & (_RULE1 == 0)).sum())
+_RULE1_F1 = 2 * _RULE1_TP / (2 * _RULE1_TP + _RULE1_FP + _RULE1_FN)
+
 class TestEvaluation(unittest.TestCase):
 
     def setUp(self):
-        self.gt_csv = "test_ground_truth.csv"
-        self.features_csv = "test_features.csv"
-        self.llm_csv = "test_llm_predictions.csv"
-        self.output_dir = "test_results_tables"
+        self._td = tempfile.TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+        self.gt_csv = os.path.join(self._td.name, "test_ground_truth.csv")
+        self.features_csv = os.path.join(self._td.name, "test_features.csv")
+        self.llm_csv = os.path.join(self._td.name, "test_llm_predictions.csv")
+        self.output_dir = os.path.join(self._td.name, "test_results_tables")
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # ダミー正解データ
-        self.dummy_gt = pd.DataFrame({
-            'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
-            'is_data_used_gt': [1, 0, 1, 0, 1]
-        })
-        self.dummy_gt.to_csv(self.gt_csv, index=False)
-
-        # ダミー特徴量データ
-        self.dummy_features = pd.DataFrame({
-            'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
-            'prediction_rule1': [1, 0, 1, 1, 0],
-            'prediction_rule2': [1, 0, 0, 1, 1]
-        })
-        self.dummy_features.to_csv(self.features_csv, index=False)
+        self.dummy_gt, self.dummy_features, self.dummy_llm = eval_fixtures()
 
-        # ダミーLLM予測データ
-        self.dummy_llm = pd.DataFrame({
-            'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
-            'prediction_rule3_abstract': [1, 0, 1, 0, 1],
-            'prediction_rule3_fulltext': [1, 0, 0, 0, 1],
-            'prediction_rule3_fulltext_few_shot': [1, 0, 1, 0, 1],
-            'prediction_rule3_gemini-2_5-flash': [1, 0, 1, 0, 1],
-            'prediction_rule3_gemini-2_5-flash_zeroshot': [1, 0, 0, 0, 1]
-        })
-        self.dummy_llm.to_csv(self.llm_csv, index=False)
+        # CSVを経由せず、src.evaluation 内の pd.read_csv がダミーデータを直接返すようにする
+        self.csv_fixtures = {
+            self.gt_csv: self.dummy_gt,
+            self.features_csv: self.dummy_features,
+            self.llm_csv: self.dummy_llm
+        }
+        read_csv_patcher = patch('src.evaluation.pd.read_csv', side_effect=self._read_csv_fixture)
+        self.mock_read_csv = read_csv_patcher.start()
+        self.addCleanup(read_csv_patcher.stop)
 
-    def tearDown(self):
-        if os.path.exists(self.gt_csv):
-            os.remove(self.gt_csv)
-        if os.path.exists(self.features_csv):
-            os.remove(self.features_csv)
-        if os.path.exists(self.llm_csv):
-            os.remove(self.llm_csv)
-        if os.path.exists(os.path.join(self.output_dir, 'evaluation_metrics_summary.csv')):
-            os.remove(os.path.join(self.output_dir, 'evaluation_metrics_summary.csv'))
-        if os.path.exists(self.output_dir):
-            os.rmdir(self.output_dir)
+    def _read_csv_fixture(self, path, **kwargs):
+        if path not in self.csv_fixtures:
+            raise FileNotFoundError(path)
+        return self.csv_fixtures[path]
 
     def test_load_and_merge_evaluation_data_success(self):
         df_eval = load_and_merge_evaluation_data(self.gt_csv, self.features_csv, self.llm_csv)
@@ -100,9 +93,13 @@ class TestEvaluation(unittest.TestCase):
         self.assertEqual(len(df_metrics), 2)
         self.assertIn('F1-Score', df_metrics.columns)
         
-        # Rule 1 のF1スコアを検証 (手計算: TP=3, TN=1, FP=1, FN=1 -> P=3/4=0.75, R=3/4=0.75, F1=0.75)
-        rule1_f1 = df_metrics.loc[df_metrics['Rule'] == 'Rule 1', 'F1-Score'].iloc[0]
-        self.assertAlmostEqual(rule1_f1, 0.75, places=2)
+        # Rule 1 の混同行列とF1スコアを検証 (TP=2, TN=1, FP=1, FN=1 -> F1=4/6)
+        rule1_metrics = df_metrics.loc[df_metrics['Rule'] == 'Rule 1'].iloc[0]
+        self.assertEqual(rule1_metrics['TP'], _RULE1_TP)
+        self.assertEqual(rule1_metrics['TN'], _RULE1_TN)
+        self.assertEqual(rule1_metrics['FP'], _RULE1_FP)
+        self.assertEqual(rule1_metrics['FN'], _RULE1_FN)
+        self.assertAlmostEqual(rule1_metrics['F1-Score'], _RULE1_F1, places=2)
 
     @patch('builtins.print')
     def test_save_evaluation_results(self, mock_print):
@@ -112,7 +109,8 @@ class TestEvaluation(unittest.TestCase):
             'Accuracy': [0.5], 'Precision': [0.5], 'Recall': [0.5], 'F1-Score': [0.5],
             'Eval_Count': [4]
         })
-        save_evaluation_results(df_metrics, output_file_name='test_metrics.csv')
+        with patch('src.evaluation.TABLES_DIR', self.output_dir):
+            save_evaluation_results(df_metrics, output_file_name='test_metrics.csv')
         self.assertTrue(os.path.exists(os.path.join(self.output_dir, 'test_metrics.csv')))
         mock_print.assert_called()
 
@@ -1,7 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-import os
 from pipeline.llm_validation_pipeline import run_llm_validation_pipeline
 from src.config import (
     GEMINI_API_KEY, GEMINI_MODEL_NAME,
@@ -11,12 +10,13 @@ from src.config import (
 
 class TestLlmValidationPipeline(unittest.TestCase):
 
-    def setUp(self):
-        self.test_samples_csv = "test_samples_with_text_pipeline.csv"
-        self.test_predictions_csv = "test_prediction_llm_pipeline.csv"
+    @classmethod
+    def setUpClass(cls):
+        cls.test_samples_csv = "test_samples_with_text_pipeline.csv"
+        cls.test_predictions_csv = "test_prediction_llm_pipeline.csv"
         
-        # Create dummy samples_with_text.csv
-        self.dummy_samples_data = {
+        # Dummy samples_with_text
+        cls.dummy_samples_data = {
             'citing_paper_eid': ['eid1', 'eid2', 'eid3', 'eid4'],
             'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4'],
             'citing_paper_title': ['Citing Title 1', 'Citing Title 2', 'Citing Title 3', 'Citing Title 4'],
@@ -24,60 +24,24 @@ class TestLlmValidationPipeline(unittest.TestCase):
             'abstract': ['Abstract 1 content.', 'Abstract 2 content.', None, 'Abstract 4 content.'],
             'full_text': ['Full text 1 content.', None, 'Full text 3 content.', 'Full text 4 content.']
         }
-        self.df_dummy_samples = pd.DataFrame(self.dummy_samples_data)
-        self.df_dummy_samples.to_csv(self.test_samples_csv, index=False)
-
-        # Create dummy prompt files
-        for prompt_file in [PROMPT_FILE_ZERO_SHOT_ABSTRACT, PROMPT_FILE_ZERO_SHOT_FULLTEXT, PROMPT_FILE_FEW_SHOT_COT_FULLTEXT]:
-            os.makedirs(os.path.dirname(prompt_file), exist_ok=True)
-            with open(prompt_file, "w", encoding="utf-8") as f:
-                f.write(f"Dummy prompt for {os.path.basename(prompt_file)}")
-
-    def tearDown(self):
-        if os.path.exists(self.test_samples_csv):
-            os.remove(self.test_samples_csv)
-        if os.path.exists(self.test_predictions_csv):
-            os.remove(self.test_predictions_csv)
-        
-        for prompt_file in [PROMPT_FILE_ZERO_SHOT_ABSTRACT, PROMPT_FILE_ZERO_SHOT_FULLTEXT, PROMPT_FILE_FEW_SHOT_COT_FULLTEXT]:
-            if os.path.exists(prompt_file):
-                os.remove(prompt_file)
-            if os.path.exists(os.path.dirname(prompt_file)) and not os.listdir(os.path.dirname(prompt_file)):
-                os.rmdir(os.path.dirname(prompt_file))
+        # pandas.read_csvはモックされるため、CSVには書き出さずDataFrameをside_effectで直接返す
+        # load_prompt_templateも全テストでモックされるため、プロンプトファイルは作成しない
+        cls.df_dummy_samples = pd.DataFrame(cls.dummy_samples_data)
 
     @patch('pipeline.llm_validation_pipeline.configure_gemini_api')
     @patch('pipeline.llm_validation_pipeline.load_prompt_template')
+    @patch('pipeline.llm_validation_pipeline.finalize_predictions')
     @patch('pipeline.llm_validation_pipeline.run_llm_prediction')
-    @patch('pipeline.llm_validation_pipeline.save_llm_predictions')
+    @patch('pipeline.llm_validation_pipeline.append_llm_predictions')
     @patch('pipeline.llm_validation_pipeline.retry_llm_predictions')
     @patch('pandas.read_csv')
     def test_run_llm_validation_pipeline_all_predictions_and_retries(
-        self, mock_read_csv, mock_retry, mock_save, mock_run_prediction, mock_load_prompt, mock_configure
+        self, mock_read_csv, mock_retry, mock_append, mock_run_prediction, mock_finalize, mock_load_prompt, mock_configure
     ):
         """
         LLM検証パイプラインが全ての設定で正常に実行される場合のテスト。
         """
-        mock_read_csv.side_effect = [
-            self.df_dummy_samples, # For initial df_samples load
-            self.df_dummy_samples.dropna(subset=['abstract']), # For abstract targets
-            self.df_dummy_samples.dropna(subset=['full_text']).drop_duplicates(subset=['citing_paper_doi']), # For fulltext zeroshot targets
-            self.df_dummy_samples.dropna(subset=['full_text']).drop_duplicates(subset=['citing_paper_doi']), # For fulltext fewshot cot targets
-            pd.DataFrame({ # For retry_llm_predictions (abstract)
-                'citing_paper_doi': ['doi1', 'doi2'],
-                'prediction_rule3_abstract': [0, -1]
-            }),
-            pd.DataFrame({ # For retry_llm_predictions (fulltext zeroshot)
-                'citing_paper_doi': ['doi1', 'doi3'],
-                'prediction_rule3_gemini-1_5-flash_zeroshot': [0, -1]
-            }),
-            pd.DataFrame({ # For retry_llm_predictions (fulltext fewshot cot)
-                'citing_paper_doi': ['doi1', 'doi3'],
-                'prediction_rule3_gemini-1_5-flash_few_shot_cot': [0, -1]
-            }),
-            self.df_dummy_samples.dropna(subset=['abstract']), # For retry_llm_predictions (abstract)
-            self.df_dummy_samples.dropna(subset=['full_text']).drop_duplicates(subset=['citing_paper_doi']), # For retry_llm_predictions (fulltext zeroshot)
-            self.df_dummy_samples.dropna(subset=['full_text']).drop_duplicates(subset=['citing_paper_doi']) # For retry_llm_predictions (fulltext fewshot cot)
-        ]
+        mock_read_csv.return_value = self.df_dummy_samples # 対象論文の抽出はパイプライン内で1回だけ行われる
 
         mock_load_prompt.return_value = "Dummy Prompt Template"
         mock_run_prediction.return_value = pd.DataFrame({
@@ -103,17 +67,65 @@ class TestLlmValidationPipeline(unittest.TestCase):
         mock_configure.assert_called_once_with(api_key="TEST_KEY")
         self.assertEqual(mock_load_prompt.call_count, 3) # Abstract, Zero-shot, Few-shot CoT
         self.assertEqual(mock_run_prediction.call_count, 3) # Abstract, Zero-shot, Few-shot CoT
-        self.assertEqual(mock_save.call_count, 3) # Abstract, Zero-shot, Few-shot CoT
+        self.assertEqual(mock_append.call_count, 3) # Abstract, Zero-shot, Few-shot CoT
+        mock_finalize.assert_called_once() # 予測結果CSVへの書き込みは最後に1回だけ
+        self.assertEqual(len(mock_finalize.call_args.kwargs['prediction_column_names']), 3)
         self.assertEqual(mock_retry.call_count, 3) # Abstract, Zero-shot, Few-shot CoT
+        mock_read_csv.assert_called_once()
+        # 再試行には抽出済みの対象論文が渡され、CSVを読み直さない
+        retried_dois = [call.kwargs['df_samples']['citing_paper_doi'].tolist() for call in mock_retry.call_args_list]
+        self.assertEqual(retried_dois, [['doi1', 'doi2', 'doi4'], ['doi1', 'doi3', 'doi4'], ['doi1', 'doi3', 'doi4']])
+
+    @patch('pipeline.llm_validation_pipeline.configure_gemini_api')
+    @patch('pipeline.llm_validation_pipeline.load_prompt_template')
+    @patch('pipeline.llm_validation_pipeline.finalize_predictions')
+    @patch('pipeline.llm_validation_pipeline.run_llm_prediction')
+    @patch('pipeline.llm_validation_pipeline.append_llm_predictions')
+    @patch('pipeline.llm_validation_pipeline.retry_llm_predictions')
+    @patch('pandas.read_csv')
+    def test_run_llm_validation_pipeline_finalizes_successful_stages_on_failure(
+        self, mock_read_csv, mock_retry, mock_append, mock_run_prediction, mock_finalize, mock_load_prompt, mock_configure
+    ):
+        """
+        一部の予測が失敗しても、成功した予測は予測結果CSVに書き込まれることを確認するテスト。
+        """
+        mock_read_csv.return_value = self.df_dummy_samples
+        mock_load_prompt.return_value = "Dummy Prompt Template"
+
+        def run_prediction(**kwargs):
+            if kwargs['prediction_column_name'].endswith('_zeroshot'):
+                raise RuntimeError("API error")
+            return pd.DataFrame({'citing_paper_doi': ['doi1'], kwargs['prediction_column_name']: [1]})
+        mock_run_prediction.side_effect = run_prediction
+
+        run_llm_validation_pipeline(
+            api_key="TEST_KEY",
+            model_name=GEMINI_MODEL_NAME,
+            input_samples_csv=self.test_samples_csv,
+            output_predictions_csv=self.test_predictions_csv,
+            run_abstract_prediction=True,
+            run_fulltext_zeroshot_prediction=True,
+            run_fulltext_fewshot_cot_prediction=True,
+            sleep_time=0.01,
+            timeout=10
+        )
+
+        self.assertEqual(mock_append.call_count, 2) # 失敗したZero-shot以外
+        mock_finalize.assert_called_once_with(
+            output_file_path=self.test_predictions_csv,
+            prediction_column_names=['prediction_rule3_abstract', f"prediction_rule3_{GEMINI_MODEL_NAME.replace('.', '_')}_few_shot_cot"]
+        )
+        mock_retry.assert_not_called() # 失敗を報告した後は再試行に進まない
 
     @patch('pipeline.llm_validation_pipeline.configure_gemini_api')
     @patch('pipeline.llm_validation_pipeline.load_prompt_template')
+    @patch('pipeline.llm_validation_pipeline.finalize_predictions')
     @patch('pipeline.llm_validation_pipeline.run_llm_prediction')
-    @patch('pipeline.llm_validation_pipeline.save_llm_predictions')
+    @patch('pipeline.llm_validation_pipeline.append_llm_predictions')
     @patch('pipeline.llm_validation_pipeline.retry_llm_predictions')
     @patch('pandas.read_csv')
     def test_run_llm_validation_pipeline_no_samples(
-        self, mock_read_csv, mock_retry, mock_save, mock_run_prediction, mock_load_prompt, mock_configure
+        self, mock_read_csv, mock_retry, mock_append, mock_run_prediction, mock_finalize, mock_load_prompt, mock_configure
     ):
         """
         入力サンプルデータがない場合、パイプラインがスキップされるテスト。
@@ -129,25 +141,23 @@ class TestLlmValidationPipeline(unittest.TestCase):
         mock_configure.assert_called_once()
         mock_load_prompt.assert_not_called()
         mock_run_prediction.assert_not_called()
-        mock_save.assert_not_called()
+        mock_append.assert_not_called()
         mock_retry.assert_not_called()
 
     @patch('pipeline.llm_validation_pipeline.configure_gemini_api')
     @patch('pipeline.llm_validation_pipeline.load_prompt_template')
+    @patch('pipeline.llm_validation_pipeline.finalize_predictions')
     @patch('pipeline.llm_validation_pipeline.run_llm_prediction')
-    @patch('pipeline.llm_validation_pipeline.save_llm_predictions')
+    @patch('pipeline.llm_validation_pipeline.append_llm_predictions')
     @patch('pipeline.llm_validation_pipeline.retry_llm_predictions')
     @patch('pandas.read_csv')
     def test_run_llm_validation_pipeline_abstract_only(
-        self, mock_read_csv, mock_retry, mock_save, mock_run_prediction, mock_load_prompt, mock_configure
+        self, mock_read_csv, mock_retry, mock_append, mock_run_prediction, mock_finalize, mock_load_prompt, mock_configure
     ):
         """
         アブストラクト予測のみ実行される場合のテスト。
         """
-        mock_read_csv.side_effect = [
-            self.df_dummy_samples, # For initial df_samples load
-            self.df_dummy_samples.dropna(subset=['abstract']) # For abstract targets
-        ]
+        mock_read_csv.return_value = self.df_dummy_samples
         mock_load_prompt.return_value = "Dummy Abstract Prompt"
         mock_run_prediction.return_value = pd.DataFrame({
             'citing_paper_doi': ['doi1', 'doi2', 'doi4'],
@@ -167,27 +177,26 @@ class TestLlmValidationPipeline(unittest.TestCase):
         mock_configure.assert_called_once()
         mock_load_prompt.assert_called_once_with(PROMPT_FILE_ZERO_SHOT_ABSTRACT)
         mock_run_prediction.assert_called_once()
-        mock_save.assert_called_once()
+        mock_append.assert_called_once()
+        mock_finalize.assert_called_once_with(output_file_path=OUTPUT_FILE_PREDICTION_LLM, prediction_column_names=['prediction_rule3_abstract'])
         mock_retry.assert_not_called()
 
     @patch('pipeline.llm_validation_pipeline.configure_gemini_api')
     @patch('pipeline.llm_validation_pipeline.load_prompt_template')
+    @patch('pipeline.llm_validation_pipeline.finalize_predictions')
     @patch('pipeline.llm_validation_pipeline.run_llm_prediction')
-    @patch('pipeline.llm_validation_pipeline.save_llm_predictions')
+    @patch('pipeline.llm_validation_pipeline.append_llm_predictions')
     @patch('pipeline.llm_validation_pipeline.retry_llm_predictions')
     @patch('pandas.read_csv')
     def test_run_llm_validation_pipeline_no_abstract_available(
-        self, mock_read_csv, mock_retry, mock_save, mock_run_prediction, mock_load_prompt, mock_configure
+        self, mock_read_csv, mock_retry, mock_append, mock_run_prediction, mock_finalize, mock_load_prompt, mock_configure
     ):
         """
         アブストラクトが利用可能な論文がない場合、アブストラクト予測がスキップされるテスト。
         """
         df_no_abstract = self.df_dummy_samples.copy()
         df_no_abstract['abstract'] = None
-        mock_read_csv.side_effect = [
-            df_no_abstract, # For initial df_samples load
-            df_no_abstract.dropna(subset=['abstract']) # For abstract targets (will be empty)
-        ]
+        mock_read_csv.return_value = df_no_abstract
 
         run_llm_validation_pipeline(
             input_samples_csv=self.test_samples_csv,
@@ -199,7 +208,7 @@ class TestLlmValidationPipeline(unittest.TestCase):
         mock_configure.assert_called_once()
         mock_load_prompt.assert_called_once_with(PROMPT_FILE_ZERO_SHOT_ABSTRACT)
         mock_run_prediction.assert_not_called() # Should be skipped
-        mock_save.assert_not_called()
+        mock_append.assert_not_called()
         mock_retry.assert_not_called()
 
 if __name__ == '__main__':
@@ -1,6 +1,9 @@
 import unittest
 import pandas as pd
 import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from unittest.mock import patch, MagicMock
 import google.generativeai as genai
 import requests
@@ -10,8 +13,18 @@ from src.llm_validator import (
     load_prompt_template,
     run_llm_prediction,
     save_llm_predictions,
+    append_llm_predictions,
+    finalize_predictions,
     retry_llm_predictions,
-    _call_gemini_api
+    _call_gemini_api,
+    _compile_prompt_template,
+    _render_prompt,
+    _parse_llm_decisions,
+    _call_gemini_batch,
+    _request_prediction,
+    _CircuitBreaker,
+    _SESSION,
+    pl
 )
 from src.config import (
     GEMINI_API_KEY, GEMINI_MODEL_NAME,
@@ -22,15 +35,14 @@ from src.config import (
 
 class TestLlmValidator(unittest.TestCase):
 
-    def setUp(self):
-        self.test_samples_csv = "test_samples_with_text.csv"
-        self.test_predictions_csv = "test_prediction_llm.csv"
-        self.test_prompt_file = "test_prompt.txt"
-        self.test_output_dir = "test_llm_output"
-        os.makedirs(self.test_output_dir, exist_ok=True)
+    @classmethod
+    def setUpClass(cls):
+        # 全テストで共通の不変なフィクスチャはクラスごとに1回だけ作成する
+        cls._class_td = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._class_td.cleanup)
 
-        # ダミーのsamples_with_text.csv
-        self.dummy_samples_data = {
+        # ダミーのsamples_with_text（run_llm_predictionには直接DataFrameを渡す）
+        cls.dummy_samples_data = {
             'citing_paper_eid': ['eid1', 'eid2', 'eid3'],
             'citing_paper_doi': ['doi1', 'doi2', 'doi3'],
             'citing_paper_title': ['Citing Title 1', 'Citing Title 2', 'Citing Title 3'],
@@ -38,22 +50,19 @@ class TestLlmValidator(unittest.TestCase):
             'abstract': ['Abstract 1 content.', 'Abstract 2 content.', 'Abstract 3 content.'],
             'full_text': ['Full text 1 content.', 'Full text 2 content.', 'Full text 3 content.']
         }
-        self.df_dummy_samples = pd.DataFrame(self.dummy_samples_data)
-        self.df_dummy_samples.to_csv(self.test_samples_csv, index=False)
+        cls.df_dummy_samples = pd.DataFrame(cls.dummy_samples_data)
 
         # ダミーのprompt.txt
-        with open(self.test_prompt_file, "w", encoding="utf-8") as f:
+        cls.test_prompt_file = os.path.join(cls._class_td.name, "test_prompt.txt")
+        with open(cls.test_prompt_file, "w", encoding="utf-8") as f:
             f.write("Cited: {cited_data_paper_title}\nCiting: {citing_paper_title}\nText: {citing_paper_text}")
 
-    def tearDown(self):
-        if os.path.exists(self.test_samples_csv):
-            os.remove(self.test_samples_csv)
-        if os.path.exists(self.test_predictions_csv):
-            os.remove(self.test_predictions_csv)
-        if os.path.exists(self.test_prompt_file):
-            os.remove(self.test_prompt_file)
-        if os.path.exists(self.test_output_dir):
-            os.rmdir(self.test_output_dir)
+    def setUp(self):
+        # ディスクに書き込むのはsave/retryのテストのみなので、テストごとの一時ディレクトリ内のパスだけを用意する
+        self._td = tempfile.TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+        self.test_samples_csv = os.path.join(self._td.name, "test_samples_with_text.csv")
+        self.test_predictions_csv = os.path.join(self._td.name, "test_prediction_llm.csv")
 
     @patch('google.generativeai.configure')
     def test_configure_gemini_api(self, mock_configure):
@@ -64,11 +73,37 @@ class TestLlmValidator(unittest.TestCase):
         template = load_prompt_template(self.test_prompt_file)
         self.assertIn("Cited:", template)
 
+    def test_load_prompt_template_reloads_modified_file(self):
+        prompt_file = os.path.join(self._td.name, "modified_prompt.txt")
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            f.write("old")
+        os.utime(prompt_file, ns=(1, 1))
+        self.assertEqual(load_prompt_template(prompt_file), "old")
+
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            f.write("new")
+        os.utime(prompt_file, ns=(2, 2))
+        self.assertEqual(load_prompt_template(prompt_file), "new")
+
     def test_load_prompt_template_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
             load_prompt_template("non_existent_prompt.txt")
 
-    @patch('requests.post')
+    def test_render_prompt_matches_str_format(self):
+        template = 'Cited: {cited_data_paper_title}\nJSON: {{"decision": "Used"}}\nText: {citing_paper_text}'
+        values = {'cited_data_paper_title': 'Data A', 'citing_paper_text': 'Body'}
+        self.assertEqual(_render_prompt(_compile_prompt_template(template), values), template.format(**values))
+
+    def test_parse_llm_decisions(self):
+        responses = [
+            '```json\n{"decision": "Used", "reason": "..."}\n```',
+            '{"decision":"Not Used"}',
+            'no json here',
+            None
+        ]
+        self.assertEqual(_parse_llm_decisions(responses).tolist(), [1, 0, -1, -1])
+
+    @patch('src.llm_validator._SESSION.post')
     def test_call_gemini_api_success(self, mock_post):
         mock_response = MagicMock()
         mock_response.raise_for_status.return_value = None
@@ -77,10 +112,133 @@ class TestLlmValidator(unittest.TestCase):
         }
         mock_post.return_value = mock_response
 
-        response_text = _call_gemini_api("test prompt", "test-model", "test-key")
+        response_text = _call_gemini_api("test prompt", "test-model", "test-key", use_cache=False)
         self.assertEqual(response_text, '{"decision": "Used"}')
         mock_post.assert_called_once()
 
+    @patch('src.llm_validator._SESSION.post')
+    def test_call_gemini_api_uses_cache(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            'candidates': [{'content': {'parts': [{'text': '{"decision": "Used"}'}]}}]
+        }
+        mock_post.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+             patch('src.llm_validator.LLM_CACHE_DIR', cache_dir):
+            first = _call_gemini_api("test prompt", "test-model", "test-key")
+            second = _call_gemini_api("test prompt", "test-model", "test-key")
+
+        self.assertEqual(first, '{"decision": "Used"}')
+        self.assertEqual(second, '{"decision": "Used"}')
+        mock_post.assert_called_once() # 2回目はキャッシュから返される
+
+    @patch('src.llm_validator._SESSION.post')
+    def test_call_gemini_api_does_not_cache_undecidable_response(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            'candidates': [{'content': {'parts': [{'text': 'I cannot decide.'}]}}]
+        }
+        mock_post.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+             patch('src.llm_validator.LLM_CACHE_DIR', cache_dir):
+            _call_gemini_api("test prompt", "test-model", "test-key")
+            _call_gemini_api("test prompt", "test-model", "test-key")
+
+        self.assertEqual(mock_post.call_count, 2) # 判定を読み取れないレスポンスはキャッシュされず再送される
+
+    @patch('src.llm_validator._SESSION.post')
+    def test_call_gemini_api_circuit_breaker_opens(self, mock_post):
+        error_response = MagicMock(status_code=503)
+        mock_post.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+
+        with patch('src.llm_validator._gemini_breaker', _CircuitBreaker(threshold=2, cooldown=60)) as breaker:
+            for _ in range(4):
+                self.assertIsNone(_call_gemini_api("test prompt", "test-model", "test-key", use_cache=False))
+            self.assertTrue(breaker.is_open())
+
+        self.assertEqual(mock_post.call_count, 2) # 2回連続で失敗した後はリクエストを送らない
+
+    @patch('src.llm_validator._SESSION.post')
+    def test_request_prediction_waits_for_open_breaker(self, mock_post):
+        failed_response = MagicMock()
+        failed_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=503))
+        succeeded_response = MagicMock()
+        succeeded_response.json.return_value = {
+            'candidates': [{'content': {'parts': [{'text': '{"decision": "Used"}'}]}}]
+        }
+        mock_post.side_effect = [failed_response, succeeded_response]
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+             patch('src.llm_validator.LLM_CACHE_DIR', cache_dir), \
+             patch('src.llm_validator._gemini_breaker', _CircuitBreaker(threshold=1, cooldown=0.05)) as breaker:
+            self.assertIsNone(_request_prediction("test prompt", "doi1", "test-model", "test-key", sleep_time=0, timeout=10))
+            self.assertTrue(breaker.is_open())
+            # ブレーカーが開いた直後の再試行も、クールダウンが明けるのを待ってから送信される
+            self.assertEqual(_request_prediction("test prompt", "doi1", "test-model", "test-key", sleep_time=0, timeout=10), '{"decision": "Used"}')
+            self.assertFalse(breaker.is_open())
+
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('src.llm_validator._SESSION.post')
+    def test_call_gemini_api_half_open_trial_ends_on_client_error(self, mock_post):
+        mock_post.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=400))
+        breaker = _CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.record_failure()
+
+        with patch('src.llm_validator._gemini_breaker', breaker):
+            self.assertIsNone(_call_gemini_api("test prompt", "test-model", "test-key", use_cache=False, breaker_wait=1))
+
+        # 半開状態の試行が429以外の4xxで終わった場合も、クールダウンをやり直さずにブレーカーを閉じる
+        self.assertIsNone(breaker.opened_at)
+        self.assertTrue(breaker.allow())
+
+    def test_call_gemini_api_rate_limited_through_adapter(self):
+        # 常に429を返すローカルサーバーに、本番と同じ再試行設定のアダプター経由でリクエストを送る
+        class RateLimitedHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.send_response(429)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), RateLimitedHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        adapter = _SESSION.get_adapter('https://generativelanguage.googleapis.com')
+        session = requests.Session()
+        # テストを速くするため、再試行間の待機だけを無くす
+        session.mount('http://', requests.adapters.HTTPAdapter(max_retries=adapter.max_retries.new(backoff_factor=0)))
+        self.addCleanup(session.close)
+        local_url = f"http://127.0.0.1:{server.server_port}/"
+
+        with patch('src.llm_validator._SESSION.post', side_effect=lambda url, **kwargs: session.post(local_url, **kwargs)), \
+             patch('src.llm_validator._gemini_breaker', _CircuitBreaker(threshold=5, cooldown=60)) as breaker:
+            self.assertIsNone(_call_gemini_api("test prompt", "test-model", "test-key", use_cache=False))
+
+        self.assertEqual(breaker.failures, 1)
+        self.assertEqual(breaker.backoff, 2.0) # 429はレート制限として記録される
+
+    @patch('src.llm_validator._SESSION.get')
+    @patch('src.llm_validator._SESSION.post')
+    def test_call_gemini_batch_gives_up_after_max_wait(self, mock_post, mock_get):
+        mock_post.return_value.json.return_value = {'name': 'batches/test-batch'}
+        mock_get.return_value.json.return_value = {'metadata': {'state': 'BATCH_STATE_RUNNING'}} # 終了状態にならない
+
+        responses = _call_gemini_batch(["prompt 1", "prompt 2"], "test-model", "test-key", poll_interval=0.01, max_wait=0.05)
+
+        self.assertEqual(responses, [None, None]) # 未完了のプロンプトは失敗扱いになり、後で再試行される
+        self.assertTrue(mock_get.called)
+        self.assertTrue(mock_post.call_args[0][0].endswith('batches/test-batch:cancel'))
+
     @patch('src.llm_validator._call_gemini_api', return_value='{"decision": "Used"}')
     def test_run_llm_prediction_success(self, mock_call_api):
         df_predictions = run_llm_prediction(
@@ -96,12 +254,32 @@ class TestLlmValidator(unittest.TestCase):
         self.assertTrue(all(df_predictions['prediction_test'] == 1))
         self.assertEqual(mock_call_api.call_count, 3)
 
-    @patch('src.llm_validator._call_gemini_api', side_effect=[
-        '{"decision": "Used"}',
-        Exception("API Error"), # Simulate an error for one row
-        '{"decision": "Not Used"}'
-    ])
+    @patch('src.llm_validator._call_gemini_api', return_value='{"decision": "Used"}')
+    def test_run_llm_prediction_collapses_duplicate_prompts(self, mock_call_api):
+        df_duplicated = pd.concat([self.df_dummy_samples, self.df_dummy_samples.iloc[[0]]], ignore_index=True)
+        df_predictions = run_llm_prediction(
+            df_to_process=df_duplicated,
+            prompt_template="Test: {citing_paper_text}",
+            text_column='abstract',
+            prediction_column_name='prediction_test',
+            api_key="TEST_KEY"
+        )
+        self.assertEqual(df_predictions['prediction_test'].tolist(), [1, 1, 1, 1])
+        self.assertEqual(mock_call_api.call_count, 3) # 重複したプロンプトは1回だけ送信される
+
+    @patch('src.llm_validator._call_gemini_api')
     def test_run_llm_prediction_with_error(self, mock_call_api):
+        # 並列実行では呼び出し順が保証されないため、プロンプトごとに応答を決める
+        responses = {
+            "Test: Abstract 1 content.": '{"decision": "Used"}',
+            "Test: Abstract 3 content.": '{"decision": "Not Used"}'
+        }
+        def fake_call_api(prompt, *args, **kwargs):
+            if prompt not in responses:
+                raise Exception("API Error") # Simulate an error for one row
+            return responses[prompt]
+        mock_call_api.side_effect = fake_call_api
+
         df_predictions = run_llm_prediction(
             df_to_process=self.df_dummy_samples,
             prompt_template="Test: {citing_paper_text}",
@@ -117,6 +295,22 @@ class TestLlmValidator(unittest.TestCase):
         self.assertEqual(df_predictions.iloc[2]['prediction_test'], 0)
         self.assertEqual(mock_call_api.call_count, 3)
 
+    @patch('src.llm_validator._call_gemini_api')
+    @patch('src.llm_validator._call_gemini_batch', return_value=['{"decision": "Used"}', None, '{"decision": "Not Used"}'])
+    def test_run_llm_prediction_with_batch(self, mock_call_batch, mock_call_api):
+        df_predictions = run_llm_prediction(
+            df_to_process=self.df_dummy_samples,
+            prompt_template="Test: {citing_paper_text}",
+            text_column='abstract',
+            prediction_column_name='prediction_test',
+            api_key="TEST_KEY",
+            use_batch=True
+        )
+        self.assertEqual(df_predictions['prediction_test'].tolist(), [1, -1, 0]) # Noneはエラー扱い
+        mock_call_batch.assert_called_once()
+        self.assertEqual(len(mock_call_batch.call_args[0][0]), 3)
+        mock_call_api.assert_not_called()
+
     def test_save_llm_predictions_new_file(self):
         df_to_save = pd.DataFrame({
             'citing_paper_eid': ['eid1'],
@@ -156,6 +350,79 @@ class TestLlmValidator(unittest.TestCase):
         self.assertEqual(loaded_df.loc[loaded_df['citing_paper_doi'] == 'doi1', 'prediction_rule3_fulltext'].iloc[0], 1)
         self.assertTrue(pd.isna(loaded_df.loc[loaded_df['citing_paper_doi'] == 'doi2', 'prediction_rule3_fulltext'].iloc[0]))
 
+    @unittest.skipUnless(pl is not None, "polarsがインストールされていません")
+    def test_save_llm_predictions_polars_matches_pandas(self):
+        # 既存の予測列が途中にあり、数字だけのDOIやカンマを含むタイトルを持つ予測結果CSV
+        df_existing = pd.DataFrame({
+            'citing_paper_eid': ['eid1', 'eid2', 'eid3'],
+            'citing_paper_doi': ['10.1000/1', '2024', '10.1000/3'],
+            'citing_paper_title': ['Title 1', 'Title, with comma', 'Title 3'],
+            'cited_data_paper_title': ['Data Title A', 'Data Title B', 'Data Title A'],
+            'prediction_rule3_abstract': [0, 1, 0],
+            'prediction_rule3_fulltext': [1, 1, 0]
+        })
+        df_new = pd.DataFrame({
+            'citing_paper_eid': ['eid1', 'eid3'],
+            'citing_paper_doi': ['10.1000/1', '10.1000/3'],
+            'citing_paper_title': ['Title 1', 'Title 3'],
+            'cited_data_paper_title': ['Data Title A', 'Data Title A'],
+            'prediction_rule3_abstract': [1, -1]
+        })
+        pandas_path = os.path.join(self._td.name, "pandas_predictions.csv")
+        polars_path = os.path.join(self._td.name, "polars_predictions.csv")
+        for path in (pandas_path, polars_path):
+            df_existing.to_csv(path, index=False, encoding='utf-8-sig')
+
+        with patch.dict(os.environ, {'DUV_FAST_IO': ''}):
+            save_llm_predictions(df_new, output_file_path=pandas_path, prediction_column_name='prediction_rule3_abstract')
+        with patch.dict(os.environ, {'DUV_FAST_IO': '1'}):
+            save_llm_predictions(df_new, output_file_path=polars_path, prediction_column_name='prediction_rule3_abstract')
+
+        with open(pandas_path, 'rb') as f_pandas, open(polars_path, 'rb') as f_polars:
+            self.assertEqual(f_polars.read(), f_pandas.read())
+
+    def test_append_and_finalize_predictions(self):
+        # 既存のファイルを作成
+        pd.DataFrame({
+            'citing_paper_eid': ['eid1', 'eid2'],
+            'citing_paper_doi': ['doi1', 'doi2'],
+            'citing_paper_title': ['Title 1', 'Title 2'],
+            'cited_data_paper_title': ['Data Title A', 'Data Title B'],
+            'prediction_rule3_abstract': [0, 1]
+        }).to_csv(self.test_predictions_csv, index=False)
+
+        df_first = self.df_dummy_samples.iloc[:2].assign(prediction_rule3_fulltext=[1, 0])
+        df_second = self.df_dummy_samples.iloc[[0]].assign(prediction_rule3_fulltext=[0])
+        append_llm_predictions(df_first, output_file_path=self.test_predictions_csv, prediction_column_name='prediction_rule3_fulltext')
+        append_llm_predictions(df_second, output_file_path=self.test_predictions_csv, prediction_column_name='prediction_rule3_fulltext')
+
+        # finalizeするまで本体は更新されない
+        self.assertNotIn('prediction_rule3_fulltext', pd.read_csv(self.test_predictions_csv).columns)
+
+        finalize_predictions(output_file_path=self.test_predictions_csv, prediction_column_names=['prediction_rule3_fulltext'])
+        loaded_df = pd.read_csv(self.test_predictions_csv)
+        self.assertEqual(loaded_df['prediction_rule3_fulltext'].tolist(), [0, 0]) # doi1は後から追記した結果を採用
+        self.assertEqual(loaded_df['prediction_rule3_abstract'].tolist(), [0, 1])
+        self.assertEqual(os.listdir(self._td.name), [os.path.basename(self.test_predictions_csv)]) # サイドカーは削除される
+
+    def test_finalize_predictions_keeps_rows_sharing_doi_without_existing_file(self):
+        # 1つの論文が2つのデータ論文を引用しており、予測結果CSV本体はまだ存在しない
+        df_predictions = pd.DataFrame({
+            'citing_paper_eid': ['eid1', 'eid1', 'eid2'],
+            'citing_paper_doi': ['doi1', 'doi1', 'doi2'],
+            'citing_paper_title': ['Title 1', 'Title 1', 'Title 2'],
+            'cited_data_paper_title': ['Data Title A', 'Data Title B', 'Data Title A'],
+            'prediction_rule3_abstract': [1, 0, 1]
+        })
+        append_llm_predictions(df_predictions, output_file_path=self.test_predictions_csv, prediction_column_name='prediction_rule3_abstract')
+        finalize_predictions(output_file_path=self.test_predictions_csv, prediction_column_names=['prediction_rule3_abstract'])
+        df_finalized = pd.read_csv(self.test_predictions_csv)
+
+        save_path = os.path.join(self._td.name, "saved_predictions.csv")
+        save_llm_predictions(df_predictions, output_file_path=save_path, prediction_column_name='prediction_rule3_abstract')
+        pd.testing.assert_frame_equal(df_finalized, pd.read_csv(save_path)) # save_llm_predictionsと同じく3行とも残る
+        self.assertEqual(len(df_finalized), 3)
+
     @patch('src.llm_validator.run_llm_prediction', return_value=pd.DataFrame({
         'citing_paper_doi': ['doi2'],
         'prediction_test_retry': [1]
@@ -2,78 +2,45 @@ import unittest
 from unittest.mock import patch, MagicMock
 import argparse
 import os
+import tempfile
+import pandas as pd
 from pipeline.main_pipeline import main_pipeline
 from src.config import (
-    SCOPUS_API_KEY, GEMINI_API_KEY, GEMINI_MODEL_NAME,
-    OUTPUT_FILE_DATA_PAPERS, OUTPUT_FILE_CITING_PAPERS_WITH_PATHS,
-    OUTPUT_FILE_ANNOTATION_TARGET_LIST, OUTPUT_FILE_SAMPLES_WITH_TEXT,
-    OUTPUT_FILE_PREDICTION_LLM, OUTPUT_FILE_FEATURES_FOR_EVALUATION,
-    OUTPUT_DIR_PROCESSED, XML_OUTPUT_DIR
+    SCOPUS_API_KEY, GEMINI_API_KEY, GEMINI_MODEL_NAME
 )
 
 class TestMainPipeline(unittest.TestCase):
 
-    def setUp(self):
-        # Clean up any existing dummy files/dirs from previous runs
-        self._cleanup_files()
-
-        # Create dummy config files/dirs if needed for pipeline imports
-        os.makedirs(OUTPUT_DIR_PROCESSED, exist_ok=True)
-        os.makedirs(XML_OUTPUT_DIR, exist_ok=True)
-        os.makedirs(os.path.dirname(OUTPUT_FILE_ANNOTATION_TARGET_LIST), exist_ok=True)
-        os.makedirs(os.path.dirname(OUTPUT_FILE_PREDICTION_LLM), exist_ok=True)
-        os.makedirs(os.path.dirname(OUTPUT_FILE_FEATURES_FOR_EVALUATION), exist_ok=True)
-
-        # Create dummy prompt files for LLM validation
-        os.makedirs('prompts', exist_ok=True)
-        with open('prompts/zero_shot_abstract.txt', 'w') as f: f.write('dummy')
-        with open('prompts/zero_shot_fulltext.txt', 'w') as f: f.write('dummy')
-        with open('prompts/few_shot_cot_fulltext.txt', 'w') as f: f.write('dummy')
+    @classmethod
+    def setUpClass(cls):
+        # 各フェーズはモックされ、ダミーの入力ファイルは変更されないため、クラスごとに1回だけ作成する
+        # パイプラインが参照するパスを一時ディレクトリ内に差し替え、リポジトリ内のファイルには触れない
+        cls._td = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._td.cleanup)
+        cls.paths = {
+            'OUTPUT_DIR_PROCESSED': os.path.join(cls._td.name, 'processed'),
+            'XML_OUTPUT_DIR': os.path.join(cls._td.name, 'xml'),
+            'OUTPUT_FILE_DATA_PAPERS': os.path.join(cls._td.name, 'processed', 'data_papers.csv'),
+            'OUTPUT_FILE_CITING_PAPERS_WITH_PATHS': os.path.join(cls._td.name, 'processed', 'citing_papers_with_paths.csv'),
+            'OUTPUT_FILE_ANNOTATION_TARGET_LIST': os.path.join(cls._td.name, 'ground_truth', 'annotation_target_list.csv'),
+            'OUTPUT_FILE_SAMPLES_WITH_TEXT': os.path.join(cls._td.name, 'processed', 'samples_with_text.csv'),
+            'OUTPUT_FILE_PREDICTION_LLM': os.path.join(cls._td.name, 'processed', 'prediction_llm.csv'),
+            'OUTPUT_FILE_FEATURES_FOR_EVALUATION': os.path.join(cls._td.name, 'processed', 'features_for_evaluation.csv')
+        }
+        paths_patcher = patch.multiple('pipeline.main_pipeline', **cls.paths)
+        paths_patcher.start()
+        cls.addClassCleanup(paths_patcher.stop)
+
+        for d in ['processed', 'xml', 'ground_truth']:
+            os.makedirs(os.path.join(cls._td.name, d), exist_ok=True)
 
         # Create dummy input files for pipelines that read them
-        pd.DataFrame({'eid': ['d1'], 'doi': ['d1'], 'title': ['t1'], 'publication_year': ['2020'], 'citedby_count': [10]}).to_csv(OUTPUT_FILE_DATA_PAPERS, index=False)
-        pd.DataFrame({'citing_paper_doi': ['c1'], 'fulltext_xml_path': ['path/to/xml'], 'download_status': ['success']}).to_csv(OUTPUT_FILE_CITING_PAPERS_WITH_PATHS, index=False)
-        pd.DataFrame({'citing_paper_doi': ['c1'], 'is_data_used_gt': [1]}).to_csv(OUTPUT_FILE_ANNOTATION_TARGET_LIST, index=False)
-        pd.DataFrame({'citing_paper_doi': ['c1'], 'abstract': ['abs'], 'full_text': ['full']}).to_csv(OUTPUT_FILE_SAMPLES_WITH_TEXT, index=False)
-        pd.DataFrame({'citing_paper_doi': ['c1'], 'prediction_rule1': [1], 'prediction_rule2': [1]}).to_csv(OUTPUT_FILE_FEATURES_FOR_EVALUATION, index=False)
-        pd.DataFrame({'citing_paper_doi': ['c1'], 'prediction_rule3_abstract': [1]}).to_csv(OUTPUT_FILE_PREDICTION_LLM, index=False)
-
-
-    def tearDown(self):
-        self._cleanup_files()
-
-    def _cleanup_files(self):
-        # Remove all files created by setup or pipelines
-        files_to_remove = [
-            OUTPUT_FILE_DATA_PAPERS,
-            OUTPUT_FILE_CITING_PAPERS_WITH_PATHS,
-            OUTPUT_FILE_ANNOTATION_TARGET_LIST,
-            OUTPUT_FILE_SAMPLES_WITH_TEXT,
-            OUTPUT_FILE_PREDICTION_LLM,
-            OUTPUT_FILE_FEATURES_FOR_EVALUATION,
-            os.path.join('prompts', 'zero_shot_abstract.txt'),
-            os.path.join('prompts', 'zero_shot_fulltext.txt'),
-            os.path.join('prompts', 'few_shot_cot_fulltext.txt'),
-            os.path.join('results', 'tables', 'evaluation_metrics_summary.csv')
-        ]
-        for f in files_to_remove:
-            if os.path.exists(f):
-                os.remove(f)
-        
-        # Remove directories if empty
-        dirs_to_remove = [
-            OUTPUT_DIR_PROCESSED,
-            XML_OUTPUT_DIR,
-            os.path.dirname(OUTPUT_FILE_ANNOTATION_TARGET_LIST),
-            os.path.dirname(OUTPUT_FILE_PREDICTION_LLM),
-            os.path.dirname(OUTPUT_FILE_FEATURES_FOR_EVALUATION),
-            'prompts',
-            os.path.join('results', 'tables'),
-            'results'
-        ]
-        for d in dirs_to_remove:
-            if os.path.exists(d) and not os.listdir(d):
-                os.rmdir(d)
+        pd.DataFrame({'eid': ['d1'], 'doi': ['d1'], 'title': ['t1'], 'publication_year': ['2020'], 'citedby_count': [10]}).to_csv(cls.paths['OUTPUT_FILE_DATA_PAPERS'], index=False)
+        pd.DataFrame({'citing_paper_doi': ['c1'], 'fulltext_xml_path': ['path/to/xml'], 'download_status': ['success']}).to_csv(cls.paths['OUTPUT_FILE_CITING_PAPERS_WITH_PATHS'], index=False)
+        pd.DataFrame({'citing_paper_doi': ['c1'], 'is_data_used_gt': [1]}).to_csv(cls.paths['OUTPUT_FILE_ANNOTATION_TARGET_LIST'], index=False)
+        pd.DataFrame({'citing_paper_doi': ['c1'], 'abstract': ['abs'], 'full_text': ['full']}).to_csv(cls.paths['OUTPUT_FILE_SAMPLES_WITH_TEXT'], index=False)
+        pd.DataFrame({'citing_paper_doi': ['c1'], 'prediction_rule1': [1], 'prediction_rule2': [1]}).to_csv(cls.paths['OUTPUT_FILE_FEATURES_FOR_EVALUATION'], index=False)
+        pd.DataFrame({'citing_paper_doi': ['c1'], 'prediction_rule3_abstract': [1]}).to_csv(cls.paths['OUTPUT_FILE_PREDICTION_LLM'], index=False)
 
     @patch('pipeline.main_pipeline.run_collect_data_pipeline')
     @patch('pipeline.main_pipeline.run_collect_citing_papers_pipeline')
@@ -112,6 +79,8 @@ class TestMainPipeline(unittest.TestCase):
             retry_failed_fulltext_fewshot_cot=False,
             llm_sleep_time=0.1,
             llm_timeout=60,
+            llm_max_workers=2,
+            llm_use_batch=False,
             best_model_column='prediction_rule3_gemini-2_5-flash'
         )
 
@@ -170,6 +139,8 @@ class TestMainPipeline(unittest.TestCase):
             retry_failed_fulltext_fewshot_cot=False,
             llm_sleep_time=0.1,
             llm_timeout=60,
+            llm_max_workers=2,
+            llm_use_batch=False,
             best_model_column='prediction_rule3_gemini-2_5-flash'
         )
 
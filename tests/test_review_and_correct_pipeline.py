@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, DEFAULT, call
 import pandas as pd
 import os
 from pipeline.review_and_correct_pipeline import run_review_and_correction_pipeline
@@ -9,6 +9,21 @@ from src.config import (
     OUTPUT_FILE_SAMPLES_WITH_TEXT
 )
 
+# パイプライン内の処理はモック化されており、これらのDataFrameは変更されないため全テストで共有する
+_MOCK_DF_REVIEW = pd.DataFrame({
+    'citing_paper_doi': ['doi1', 'doi2', 'doi3'],
+    'is_data_used_gt': [1, 0, 1],
+    'prediction_rule3_gemini-2_5-flash': [1, 1, 0],
+    'full_text': ['text1', 'text2', 'text3']
+})
+
+_MOCK_DISAGREEMENTS = pd.DataFrame({
+    'citing_paper_doi': ['doi2', 'doi3'],
+    'citing_paper_title': ['Title B', 'Title C'],
+    'Human_Label': ['Not Used', 'Used'],
+    'LLM_Prediction': ['Used', 'Not Used']
+})
+
 class TestReviewAndCorrectPipeline(unittest.TestCase):
 
     def setUp(self):
@@ -39,6 +54,21 @@ class TestReviewAndCorrectPipeline(unittest.TestCase):
         })
         self.dummy_samples.to_csv(self.samples_with_text_csv, index=False)
 
+        # パイプラインが呼び出す4つの関数は全テストでモック化するため、1つのパッチャーでまとめて差し替える
+        patcher = patch.multiple(
+            'pipeline.review_and_correct_pipeline',
+            load_and_merge_review_data=DEFAULT,
+            identify_disagreements=DEFAULT,
+            generate_review_prompts=DEFAULT,
+            apply_corrections_to_ground_truth=DEFAULT
+        )
+        mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_load_and_merge = mocks['load_and_merge_review_data']
+        self.mock_identify_disagreements = mocks['identify_disagreements']
+        self.mock_generate_prompts = mocks['generate_review_prompts']
+        self.mock_apply_corrections = mocks['apply_corrections_to_ground_truth']
+
     def tearDown(self):
         if os.path.exists(self.ground_truth_csv):
             os.remove(self.ground_truth_csv)
@@ -47,31 +77,12 @@ class TestReviewAndCorrectPipeline(unittest.TestCase):
         if os.path.exists(self.samples_with_text_csv):
             os.remove(self.samples_with_text_csv)
 
-    @patch('pipeline.review_and_correct_pipeline.load_and_merge_review_data')
-    @patch('pipeline.review_and_correct_pipeline.identify_disagreements')
-    @patch('pipeline.review_and_correct_pipeline.generate_review_prompts')
-    @patch('pipeline.review_and_correct_pipeline.apply_corrections_to_ground_truth')
-    def test_run_review_and_correction_pipeline_success_with_prompts(
-        self, mock_apply_corrections, mock_generate_prompts, mock_identify_disagreements, mock_load_and_merge
-    ):
+    def test_run_review_and_correction_pipeline_success_with_prompts(self):
         """
         レビューと修正パイプラインがプロンプト生成ありで正常に実行される場合のテスト。
         """
-        mock_df_review = pd.DataFrame({
-            'citing_paper_doi': ['doi1', 'doi2', 'doi3'],
-            'is_data_used_gt': [1, 0, 1],
-            'prediction_rule3_gemini-2_5-flash': [1, 1, 0],
-            'full_text': ['text1', 'text2', 'text3']
-        })
-        mock_load_and_merge.return_value = mock_df_review
-
-        mock_disagreements = pd.DataFrame({
-            'citing_paper_doi': ['doi2', 'doi3'],
-            'citing_paper_title': ['Title B', 'Title C'],
-            'Human_Label': ['Not Used', 'Used'],
-            'LLM_Prediction': ['Used', 'Not Used']
-        })
-        mock_identify_disagreements.return_value = mock_disagreements
+        self.mock_load_and_merge.return_value = _MOCK_DF_REVIEW
+        self.mock_identify_disagreements.return_value = _MOCK_DISAGREEMENTS
 
         run_review_and_correction_pipeline(
             ground_truth_csv=self.ground_truth_csv,
@@ -82,41 +93,32 @@ class TestReviewAndCorrectPipeline(unittest.TestCase):
             generate_prompts=True
         )
 
-        mock_load_and_merge.assert_called_once_with(
-            ground_truth_csv=self.ground_truth_csv,
-            llm_predictions_csv=self.llm_predictions_csv,
-            samples_with_text_csv=self.samples_with_text_csv,
-            best_model_column=self.best_model_column
-        )
-        mock_identify_disagreements.assert_called_once_with(mock_df_review, self.best_model_column)
-        mock_generate_prompts.assert_called_once_with(mock_disagreements, self.best_model_column)
-        mock_apply_corrections.assert_not_called()
-
-    @patch('pipeline.review_and_correct_pipeline.load_and_merge_review_data')
-    @patch('pipeline.review_and_correct_pipeline.identify_disagreements')
-    @patch('pipeline.review_and_correct_pipeline.generate_review_prompts')
-    @patch('pipeline.review_and_correct_pipeline.apply_corrections_to_ground_truth')
-    def test_run_review_and_correction_pipeline_success_with_corrections(
-        self, mock_apply_corrections, mock_generate_prompts, mock_identify_disagreements, mock_load_and_merge
-    ):
+        # 4つのモックの呼び出し履歴をまとめて比較する（各1回ずつ呼ばれ、修正の適用は呼ばれない）
+        actual = [
+            self.mock_load_and_merge.call_args_list,
+            self.mock_identify_disagreements.call_args_list,
+            self.mock_generate_prompts.call_args_list,
+            self.mock_apply_corrections.call_args_list
+        ]
+        expected = [
+            [call(
+                ground_truth_csv=self.ground_truth_csv,
+                llm_predictions_csv=self.llm_predictions_csv,
+                samples_with_text_csv=self.samples_with_text_csv,
+                best_model_column=self.best_model_column
+            )],
+            [call(_MOCK_DF_REVIEW, self.best_model_column)],
+            [call(_MOCK_DISAGREEMENTS, self.best_model_column)],
+            []
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_run_review_and_correction_pipeline_success_with_corrections(self):
         """
         レビューと修正パイプラインが修正適用ありで正常に実行される場合のテスト。
         """
-        mock_df_review = pd.DataFrame({
-            'citing_paper_doi': ['doi1', 'doi2', 'doi3'],
-            'is_data_used_gt': [1, 0, 1],
-            'prediction_rule3_gemini-2_5-flash': [1, 1, 0],
-            'full_text': ['text1', 'text2', 'text3']
-        })
-        mock_load_and_merge.return_value = mock_df_review
-
-        mock_disagreements = pd.DataFrame({
-            'citing_paper_doi': ['doi2', 'doi3'],
-            'citing_paper_title': ['Title B', 'Title C'],
-            'Human_Label': ['Not Used', 'Used'],
-            'LLM_Prediction': ['Used', 'Not Used']
-        })
-        mock_identify_disagreements.return_value = mock_disagreements
+        self.mock_load_and_merge.return_value = _MOCK_DF_REVIEW
+        self.mock_identify_disagreements.return_value = _MOCK_DISAGREEMENTS
 
         test_corrections = {'doi2': 0}
 
@@ -129,22 +131,16 @@ class TestReviewAndCorrectPipeline(unittest.TestCase):
             generate_prompts=False # プロンプト生成はスキップ
         )
 
-        mock_load_and_merge.assert_called_once()
-        mock_identify_disagreements.assert_called_once()
-        mock_generate_prompts.assert_not_called()
-        mock_apply_corrections.assert_called_once_with(test_corrections, self.ground_truth_csv)
-
-    @patch('pipeline.review_and_correct_pipeline.load_and_merge_review_data')
-    @patch('pipeline.review_and_correct_pipeline.identify_disagreements')
-    @patch('pipeline.review_and_correct_pipeline.generate_review_prompts')
-    @patch('pipeline.review_and_correct_pipeline.apply_corrections_to_ground_truth')
-    def test_run_review_and_correction_pipeline_no_review_data(
-        self, mock_apply_corrections, mock_generate_prompts, mock_identify_disagreements, mock_load_and_merge
-    ):
+        self.mock_load_and_merge.assert_called_once()
+        self.mock_identify_disagreements.assert_called_once()
+        self.mock_generate_prompts.assert_not_called()
+        self.mock_apply_corrections.assert_called_once_with(test_corrections, self.ground_truth_csv)
+
+    def test_run_review_and_correction_pipeline_no_review_data(self):
         """
         レビュー対象のデータがない場合、パイプラインがスキップされるテスト。
         """
-        mock_load_and_merge.return_value = pd.DataFrame() # 空のDataFrameを返す
+        self.mock_load_and_merge.return_value = pd.DataFrame() # 空のDataFrameを返す
 
         run_review_and_correction_pipeline(
             ground_truth_csv=self.ground_truth_csv,
@@ -155,10 +151,10 @@ class TestReviewAndCorrectPipeline(unittest.TestCase):
             generate_prompts=True
         )
 
-        mock_load_and_merge.assert_called_once()
-        mock_identify_disagreements.assert_not_called()
-        mock_generate_prompts.assert_not_called()
-        mock_apply_corrections.assert_not_called()
+        self.mock_load_and_merge.assert_called_once()
+        self.mock_identify_disagreements.assert_not_called()
+        self.mock_generate_prompts.assert_not_called()
+        self.mock_apply_corrections.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
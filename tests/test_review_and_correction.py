@@ -1,6 +1,9 @@
 import unittest
 import pandas as pd
 import os
+import pathlib
+import shutil
+import tempfile
 from unittest.mock import patch, MagicMock
 
 from src.review_and_correction import (
@@ -17,42 +20,49 @@ from src.config import (
 
 class TestReviewAndCorrection(unittest.TestCase):
 
-    def setUp(self):
-        self.gt_csv = "test_ground_truth.csv"
-        self.llm_csv = "test_llm_predictions.csv"
-        self.samples_csv = "test_samples_with_text.csv"
+    @classmethod
+    def setUpClass(cls):
+        # 入力CSVはクラスごとに1回だけ一時ディレクトリに書き出す
+        cls._class_td = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._class_td.cleanup)
+        cls.gt_csv = os.path.join(cls._class_td.name, "test_ground_truth.csv")
+        cls.llm_csv = os.path.join(cls._class_td.name, "test_llm_predictions.csv")
+        cls.samples_csv = os.path.join(cls._class_td.name, "test_samples_with_text.csv")
 
         # ダミー正解データ
-        self.dummy_gt = pd.DataFrame({
+        cls.dummy_gt = pd.DataFrame({
             'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
             'citing_paper_title': ['Title A', 'Title B', 'Title C', 'Title D', 'Title E'],
             'is_data_used_gt': [1, 0, 1, 0, 1]
         })
-        self.dummy_gt.to_csv(self.gt_csv, index=False)
+        cls.dummy_gt.to_csv(cls.gt_csv, index=False)
 
         # ダミーLLM予測データ
-        self.dummy_llm = pd.DataFrame({
+        cls.dummy_llm = pd.DataFrame({
             'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
             'prediction_rule3_gemini-2_5-flash': [1, 1, 0, 0, -1] # doi2, doi3, doi5が不一致/エラー
         })
-        self.dummy_llm.to_csv(self.llm_csv, index=False)
+        cls.dummy_llm.to_csv(cls.llm_csv, index=False)
 
         # ダミーsamples_with_textデータ
-        self.dummy_samples = pd.DataFrame({
+        cls.dummy_samples = pd.DataFrame({
             'citing_paper_doi': ['doi1', 'doi2', 'doi3', 'doi4', 'doi5'],
             'cited_data_paper_title': ['Data A', 'Data B', 'Data C', 'Data D', 'Data E'],
             'citing_paper_title': ['Title A', 'Title B', 'Title C', 'Title D', 'Title E'],
             'full_text': ['Full text for A', 'Full text for B', 'Full text for C', 'Full text for D', 'Full text for E']
         })
-        self.dummy_samples.to_csv(self.samples_csv, index=False)
+        cls.dummy_samples.to_csv(cls.samples_csv, index=False)
 
-    def tearDown(self):
-        if os.path.exists(self.gt_csv):
-            os.remove(self.gt_csv)
-        if os.path.exists(self.llm_csv):
-            os.remove(self.llm_csv)
-        if os.path.exists(self.samples_csv):
-            os.remove(self.samples_csv)
+        # 読み込み・結合済みのレビュー用データは、読み取り専用のテストで使い回す
+        cls._df_review = load_and_merge_review_data(cls.gt_csv, cls.llm_csv, cls.samples_csv)
+
+    def _copy_gt_csv(self) -> str:
+        """正解データCSVを変更するテスト用に、テストごとの一時ディレクトリへコピーしたパスを返す"""
+        td = tempfile.TemporaryDirectory()
+        self.addCleanup(td.cleanup)
+        gt_csv = os.path.join(td.name, os.path.basename(self.gt_csv))
+        shutil.copyfile(self.gt_csv, gt_csv)
+        return gt_csv
 
     def test_load_and_merge_review_data_success(self):
         df_review = load_and_merge_review_data(self.gt_csv, self.llm_csv, self.samples_csv)
@@ -67,8 +77,7 @@ class TestReviewAndCorrection(unittest.TestCase):
         self.assertTrue(df_review.empty)
 
     def test_identify_disagreements(self):
-        df_review = load_and_merge_review_data(self.gt_csv, self.llm_csv, self.samples_csv)
-        disagreements = identify_disagreements(df_review, 'prediction_rule3_gemini-2_5-flash')
+        disagreements = identify_disagreements(self._df_review, 'prediction_rule3_gemini-2_5-flash')
         self.assertFalse(disagreements.empty)
         self.assertEqual(len(disagreements), 2) # doi2 (GT=0, LLM=1), doi3 (GT=1, LLM=0)
         self.assertEqual(disagreements.iloc[0]['citing_paper_doi'], 'doi2')
@@ -77,8 +86,7 @@ class TestReviewAndCorrection(unittest.TestCase):
 
     @patch('builtins.print')
     def test_generate_review_prompts(self, mock_print):
-        df_review = load_and_merge_review_data(self.gt_csv, self.llm_csv, self.samples_csv)
-        disagreements = identify_disagreements(df_review, 'prediction_rule3_gemini-2_5-flash')
+        disagreements = identify_disagreements(self._df_review, 'prediction_rule3_gemini-2_5-flash')
         generate_review_prompts(disagreements)
         mock_print.assert_called()
         # プロンプトの内容の一部がprintされたことを確認
@@ -90,18 +98,24 @@ class TestReviewAndCorrection(unittest.TestCase):
             'doi3': 1, # LLMが0と予測したがGTは1、修正なし
             'doi4': 1  # GTが0だが、これを1に修正
         }
-        apply_corrections_to_ground_truth(corrections, self.gt_csv)
-        
-        loaded_gt = pd.read_csv(self.gt_csv)
+        # 検証したいのはラベルの書き換えのみなので、CSVの読み書きはディスクを介さずメモリ上で行う
+        written_frames = []
+        with patch('src.review_and_correction.pd.read_csv', return_value=self.dummy_gt.copy()) as mock_read_csv, \
+             patch('pandas.DataFrame.to_csv', autospec=True, side_effect=lambda df, *args, **kwargs: written_frames.append(df.copy())):
+            apply_corrections_to_ground_truth(corrections, self.gt_csv)
+
+        mock_read_csv.assert_called_once_with(self.gt_csv)
+        self.assertEqual(len(written_frames), 1)
+        loaded_gt = written_frames[0]
         self.assertEqual(loaded_gt.loc[loaded_gt['citing_paper_doi'] == 'doi2', 'is_data_used_gt'].iloc[0], 0)
         self.assertEqual(loaded_gt.loc[loaded_gt['citing_paper_doi'] == 'doi3', 'is_data_used_gt'].iloc[0], 1)
         self.assertEqual(loaded_gt.loc[loaded_gt['citing_paper_doi'] == 'doi4', 'is_data_used_gt'].iloc[0], 1)
 
     def test_apply_corrections_to_ground_truth_no_corrections(self):
-        original_df = pd.read_csv(self.gt_csv)
-        apply_corrections_to_ground_truth({}, self.gt_csv)
-        loaded_df = pd.read_csv(self.gt_csv)
-        pd.testing.assert_frame_equal(original_df, loaded_df) # 変更がないことを確認
+        gt_csv = self._copy_gt_csv()
+        original_bytes = pathlib.Path(gt_csv).read_bytes()
+        apply_corrections_to_ground_truth({}, gt_csv)
+        self.assertEqual(pathlib.Path(gt_csv).read_bytes(), original_bytes) # ファイルが書き換えられていないことを確認
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 import unittest
+import numpy as np
 import pandas as pd
 import os
+import tempfile
 from unittest.mock import patch, MagicMock
 
 from src.sampling import create_annotation_sampling_list
@@ -8,30 +10,31 @@ from src.config import OUTPUT_FILE_CITING_PAPERS_WITH_PATHS
 
 class TestSampling(unittest.TestCase):
 
-    def setUp(self):
-        self.test_results_csv = "test_citing_papers_with_paths.csv"
-        self.test_output_dir = "test_ground_truth"
-        self.test_output_file = os.path.join(self.test_output_dir, "test_annotation_target_list.csv")
-        os.makedirs(self.test_output_dir, exist_ok=True)
+    @classmethod
+    def setUpClass(cls):
+        # 入力CSVはどのテストでも変更されないため、クラスごとに1回だけ一時ディレクトリに作成する
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls._tmp.cleanup)
+        cls.test_results_csv = os.path.join(cls._tmp.name, "citing_papers_with_paths.csv")
 
-        self.dummy_data = {
-            'citing_paper_eid': [f'eid{i}' for i in range(1, 11)],
-            'citing_paper_doi': [f'doi{i}' for i in range(1, 11)],
-            'citing_paper_title': [f'Title {i}' for i in range(1, 11)],
-            'cited_data_paper_title': [f'Data Title {i}' for i in range(1, 11)],
+        idx = np.arange(1, 11).astype(str)
+        cls.dummy_data = {
+            'citing_paper_eid': np.char.add('eid', idx),
+            'citing_paper_doi': np.char.add('doi', idx),
+            'citing_paper_title': np.char.add('Title ', idx),
+            'cited_data_paper_title': np.char.add('Data Title ', idx),
             'download_status': ['success (downloaded)'] * 8 + ['failed'] * 2,
-            'fulltext_xml_path': [f'path{i}.xml' for i in range(1, 11)]
+            'fulltext_xml_path': np.char.add(np.char.add('path', idx), '.xml')
         }
-        self.df_dummy = pd.DataFrame(self.dummy_data)
-        self.df_dummy.to_csv(self.test_results_csv, index=False)
+        cls.df_dummy = pd.DataFrame(cls.dummy_data)
+        cls.df_dummy.to_csv(cls.test_results_csv, index=False)
 
-    def tearDown(self):
-        if os.path.exists(self.test_results_csv):
-            os.remove(self.test_results_csv)
-        if os.path.exists(self.test_output_file):
-            os.remove(self.test_output_file)
-        if os.path.exists(self.test_output_dir):
-            os.rmdir(self.test_output_dir)
+    def setUp(self):
+        # 出力ファイルの有無を検証するため、出力先はテストごとの一時ディレクトリにする
+        self._td = tempfile.TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+        self.test_output_dir = self._td.name
+        self.test_output_file = os.path.join(self.test_output_dir, "test_annotation_target_list.csv")
 
     def test_create_annotation_sampling_list_success(self):
         sample_df = create_annotation_sampling_list(
@@ -71,18 +74,20 @@ class TestSampling(unittest.TestCase):
 
     def test_create_annotation_sampling_list_no_success_downloads(self):
         # 全て失敗のダミーデータを作成
+        idx = np.arange(1, 5).astype(str)
         dummy_data_failed = {
-            'citing_paper_eid': [f'eid{i}' for i in range(1, 5)],
-            'citing_paper_doi': [f'doi{i}' for i in range(1, 5)],
-            'citing_paper_title': [f'Title {i}' for i in range(1, 5)],
-            'cited_data_paper_title': [f'Data Title {i}' for i in range(1, 5)],
+            'citing_paper_eid': np.char.add('eid', idx),
+            'citing_paper_doi': np.char.add('doi', idx),
+            'citing_paper_title': np.char.add('Title ', idx),
+            'cited_data_paper_title': np.char.add('Data Title ', idx),
             'download_status': ['failed'] * 4,
-            'fulltext_xml_path': [f'path{i}.xml' for i in range(1, 5)]
+            'fulltext_xml_path': np.char.add(np.char.add('path', idx), '.xml')
         }
-        pd.DataFrame(dummy_data_failed).to_csv(self.test_results_csv, index=False)
+        failed_results_csv = os.path.join(self.test_output_dir, "citing_papers_with_paths_failed.csv")
+        pd.DataFrame(dummy_data_failed).to_csv(failed_results_csv, index=False)
 
         sample_df = create_annotation_sampling_list(
-            results_csv_path=self.test_results_csv,
+            results_csv_path=failed_results_csv,
             output_dir=self.test_output_dir,
             output_file_name="test_annotation_target_list.csv",
             sample_size=2
@@ -3,11 +3,61 @@ from unittest.mock import patch, MagicMock
 import pandas as pd
 import os
 import requests # Add this import
+import types
+from functools import cache
 from src.scopus_api import get_total_data_papers_count, collect_data_papers, save_data_papers_to_csv
 from src.config import SCOPUS_API_KEY, SCOPUS_BASE_URL, SCOPUS_QUERY_DATA_PAPERS, OUTPUT_DIR_PROCESSED, OUTPUT_FILE_DATA_PAPERS
 
+# Scopus APIのレスポンスはテスト対象から読み取られるだけなので、読み取り専用の定数として1回だけ作成する
+_TOTAL_RESULTS_RESPONSE = types.MappingProxyType({
+    'search-results': types.MappingProxyType({
+        'opensearch:totalResults': '100'
+    })
+})
+
+# 最初のレスポンス
+_COLLECT_PAGE_1 = types.MappingProxyType({
+    'search-results': types.MappingProxyType({
+        'entry': (
+            types.MappingProxyType({'eid': 'eid1', 'prism:doi': 'doi1', 'dc:title': 'title1', 'prism:coverDate': '2020-01-01', 'citedby-count': '10'}),
+            types.MappingProxyType({'eid': 'eid2', 'prism:doi': 'doi2', 'dc:title': 'title2', 'prism:coverDate': '2021-01-01', 'citedby-count': '20'})
+        ),
+        'link': (types.MappingProxyType({'@ref': 'next', '@href': 'http://example.com?cursor=next_cursor'}),)
+    })
+})
+
+# 2番目のレスポンス (最後のページ)
+_COLLECT_PAGE_2 = types.MappingProxyType({
+    'search-results': types.MappingProxyType({
+        'entry': (
+            types.MappingProxyType({'eid': 'eid3', 'prism:doi': 'doi3', 'dc:title': 'title3', 'prism:coverDate': '2022-01-01', 'citedby-count': '30'}),
+        ),
+        'link': () # 次のページがないことを示す
+    })
+})
+
+@cache
+def _make_df() -> pd.DataFrame:
+    """
+    保存テスト用のダミーのデータ論文DataFrameを返します。
+    テスト対象はto_csvをモック化した上で読み取るだけなので、同じインスタンスを使い回します。
+
+    Returns:
+        pd.DataFrame: 1件のデータ論文を含むDataFrame。
+    """
+    return pd.DataFrame([
+        {'eid': 'eid1', 'doi': 'doi1', 'title': 'title1', 'publication_year': '2020', 'citedby_count': '10'}
+    ])
+
 class TestScopusApi(unittest.TestCase):
 
+    def setUp(self):
+        # ページング処理でのサーバーへの配慮のsleepは、全テストで待たずに済むようにモック化する
+        # src.scopus_apiはtimeモジュールをimportしているため、この1か所のパッチで十分
+        sleep_patcher = patch('src.scopus_api.time.sleep', return_value=None)
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
     @patch('requests.get')
     def test_get_total_data_papers_count_success(self, mock_get):
         """
@@ -15,11 +65,7 @@ class TestScopusApi(unittest.TestCase):
         """
         mock_response = MagicMock()
         mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = {
-            'search-results': {
-                'opensearch:totalResults': '100'
-            }
-        }
+        mock_response.json.return_value = _TOTAL_RESULTS_RESPONSE
         mock_get.return_value = mock_response
 
         count = get_total_data_papers_count(api_key="TEST_KEY", query="TEST_QUERY")
@@ -39,35 +85,17 @@ class TestScopusApi(unittest.TestCase):
         self.assertEqual(count, 0)
 
     @patch('requests.get')
-    @patch('time.sleep', return_value=None) # sleepをモック化
-    def test_collect_data_papers_success(self, mock_sleep, mock_get):
+    def test_collect_data_papers_success(self, mock_get):
         """
         データ論文収集が成功した場合のテスト。
         """
-        # 最初のレスポンス
         mock_response1 = MagicMock()
         mock_response1.raise_for_status.return_value = None
-        mock_response1.json.return_value = {
-            'search-results': {
-                'entry': [
-                    {'eid': 'eid1', 'prism:doi': 'doi1', 'dc:title': 'title1', 'prism:coverDate': '2020-01-01', 'citedby-count': '10'},
-                    {'eid': 'eid2', 'prism:doi': 'doi2', 'dc:title': 'title2', 'prism:coverDate': '2021-01-01', 'citedby-count': '20'}
-                ],
-                'link': [{'@ref': 'next', '@href': 'http://example.com?cursor=next_cursor'}]
-            }
-        }
-
-        # 2番目のレスポンス (最後のページ)
+        mock_response1.json.return_value = _COLLECT_PAGE_1
+
         mock_response2 = MagicMock()
         mock_response2.raise_for_status.return_value = None
-        mock_response2.json.return_value = {
-            'search-results': {
-                'entry': [
-                    {'eid': 'eid3', 'prism:doi': 'doi3', 'dc:title': 'title3', 'prism:coverDate': '2022-01-01', 'citedby-count': '30'}
-                ],
-                'link': [] # 次のページがないことを示す
-            }
-        }
+        mock_response2.json.return_value = _COLLECT_PAGE_2
         mock_get.side_effect = [mock_response1, mock_response2]
 
         df = collect_data_papers(api_key="TEST_KEY", query="TEST_QUERY", total_results=3)
@@ -83,9 +111,7 @@ class TestScopusApi(unittest.TestCase):
         """
         データ論文の保存が成功した場合のテスト。
         """
-        df = pd.DataFrame([
-            {'eid': 'eid1', 'doi': 'doi1', 'title': 'title1', 'publication_year': '2020', 'citedby_count': '10'}
-        ])
+        df = _make_df()
         
         test_output_dir = "test_output"
         test_output_file = os.path.join(test_output_dir, "test_data.csv")
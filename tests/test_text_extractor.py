@@ -1,20 +1,26 @@
 import unittest
-import xml.etree.ElementTree as ET
+import copy
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 from src.text_extractor import extract_abstract_robustly, extract_full_text_robustly, NAMESPACES
 
 class TestTextExtractor(unittest.TestCase):
 
-    def setUp(self):
-        # ダミーXMLコンテンツ
-        self.dummy_xml_content_full = f"""
+    @classmethod
+    def setUpClass(cls):
+        # ダミーXMLはどのテストでも変更しないため、クラスごとに1回だけパースする
+        # ダミーXMLコンテンツ（2つのアブストラクトのclass属性をテンプレートの置換で切り替える）
+        cls.dummy_xml_template = f"""
         <ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
             <ja:head>
-                <ce:abstract class="author">
+                <ce:abstract class="{{author_class}}">
                     <ce:abstract-sec>
                         <ce:simple-para>This is the author's abstract. It describes the paper's content.</ce:simple-para>
                     </ce:abstract-sec>
                 </ce:abstract>
-                <ce:abstract>
+                <ce:abstract{{general_class}}>
                     <ce:abstract-sec>
                         <ce:simple-para>This is a general abstract.</ce:simple-para>
                     </ce:abstract-sec>
@@ -52,9 +58,10 @@ class TestTextExtractor(unittest.TestCase):
             </xocs:doc>
         </ja:article>
         """
-        self.root_full = ET.fromstring(self.dummy_xml_content_full)
+        cls.dummy_xml_content_full = cls.dummy_xml_template.format(author_class='author', general_class='')
+        cls.root_full = ET.fromstring(cls.dummy_xml_content_full)
 
-        self.dummy_xml_no_abstract = f"""
+        cls.dummy_xml_no_abstract = f"""
         <ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
             <ja:head>
                 <core:coredata>
@@ -71,9 +78,9 @@ class TestTextExtractor(unittest.TestCase):
             </ja:body>
         </ja:article>
         """
-        self.root_no_abstract = ET.fromstring(self.dummy_xml_no_abstract)
+        cls.root_no_abstract = ET.fromstring(cls.dummy_xml_no_abstract)
 
-        self.dummy_xml_no_body = f"""
+        cls.dummy_xml_no_body = f"""
         <ja:article xmlns:ja="{NAMESPACES['ja']}" xmlns:ce="{NAMESPACES['ce']}" xmlns:dc="{NAMESPACES['dc']}" xmlns:core="{NAMESPACES['core']}" xmlns:xocs="{NAMESPACES['xocs']}">
             <ja:head>
                 <ce:abstract class="author">
@@ -84,7 +91,20 @@ class TestTextExtractor(unittest.TestCase):
             </ja:head>
         </ja:article>
         """
-        self.root_no_body = ET.fromstring(self.dummy_xml_no_body)
+        cls.root_no_body = ET.fromstring(cls.dummy_xml_no_body)
+
+        # 一部のアブストラクトがない場合のXMLも、テンプレートから作成して1回だけパースする
+        # author abstractがない場合
+        cls.root_no_author_abstract = ET.fromstring(cls.dummy_xml_template.format(author_class='other', general_class=''))
+        # author abstractもgeneral abstractもない場合
+        cls.root_no_other_abstracts = ET.fromstring(cls.dummy_xml_template.format(author_class='other', general_class=' class="other_general"'))
+        # structured bodyがない場合（文字列の置換では閉じタグが残り不正なXMLになるため、パース済みツリーのコピーでタグ名を変更する）
+        cls.root_raw_text_only = copy.deepcopy(cls.root_full)
+        cls.root_raw_text_only.find('ja:body', NAMESPACES).tag = f"{{{NAMESPACES['ja']}}}body_other"
+
+    def test_parsed_root_is_element(self):
+        # lxmlとElementTreeのどちらでパースしても、抽出関数に渡せる要素であることを確認
+        self.assertTrue(ET.iselement(self.root_full))
 
     def test_extract_abstract_robustly_author_abstract(self):
         abstract = extract_abstract_robustly(self.root_full)
@@ -92,16 +112,12 @@ class TestTextExtractor(unittest.TestCase):
 
     def test_extract_abstract_robustly_general_abstract(self):
         # author abstractがない場合をシミュレート
-        root_no_author_abstract = ET.fromstring(self.dummy_xml_content_full.replace('<ce:abstract class="author">', '<ce:abstract class="other">'))
-        abstract = extract_abstract_robustly(root_no_author_abstract)
+        abstract = extract_abstract_robustly(self.root_no_author_abstract)
         self.assertEqual(abstract, "This is a general abstract.")
 
     def test_extract_abstract_robustly_metadata_abstract(self):
         # author abstractもgeneral abstractもない場合をシミュレート
-        xml_content = self.dummy_xml_content_full.replace('<ce:abstract class="author">', '<ce:abstract class="other">')
-        xml_content = xml_content.replace('<ce:abstract>', '<ce:abstract class="other_general">')
-        root_no_other_abstracts = ET.fromstring(xml_content)
-        abstract = extract_abstract_robustly(root_no_other_abstracts)
+        abstract = extract_abstract_robustly(self.root_no_other_abstracts)
         self.assertEqual(abstract, "This is a metadata abstract.")
 
     def test_extract_abstract_robustly_no_abstract(self):
@@ -124,9 +140,7 @@ class TestTextExtractor(unittest.TestCase):
 
     def test_extract_full_text_robustly_raw_text(self):
         # structured bodyがない場合をシミュレート
-        xml_content = self.dummy_xml_content_full.replace('<ja:body>', '<ja:body_other>')
-        root_no_structured_body = ET.fromstring(xml_content)
-        full_text = extract_full_text_robustly(root_no_structured_body)
+        full_text = extract_full_text_robustly(self.root_raw_text_only)
         self.assertEqual(full_text, "This is raw text content. It might be less structured.")
 
     def test_extract_full_text_robustly_no_full_text(self):
@@ -1,15 +1,28 @@
 import unittest
-import xml.etree.ElementTree as ET
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 import pandas as pd
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
 from src.xml_processor import (
     get_citation_map_et,
+    get_citation_map_streaming,
     find_target_ref_id,
+    build_citation_index,
     parse_sections_recursive,
     analyze_single_xml,
+    _load_document,
     process_xml_for_features,
+    _make_file_exists,
+    _analyze_xml_titles,
+    _write_features_csv,
+    pa,
+    _SCANDIR_THRESHOLD,
     namespaces
 )
 from src.config import (
@@ -112,6 +125,12 @@ class TestXmlProcessor(unittest.TestCase):
         self.assertIn('ref3', citation_map)
         self.assertEqual(citation_map['ref3'], 'Citation for Target Data Paper')
 
+    def test_get_citation_map_streaming(self):
+        citation_map = get_citation_map_streaming(self.test_xml_path)
+        self.assertEqual(citation_map['ref3'], 'Citation for Target Data Paper')
+        # ツリー全体を構築した場合と同じ結果になることを確認
+        self.assertEqual(citation_map, get_citation_map_et(ET.fromstring(self.dummy_xml_content)))
+
     def test_find_target_ref_id(self):
         root = ET.fromstring(self.dummy_xml_content)
         citation_map = get_citation_map_et(root)
@@ -120,6 +139,14 @@ class TestXmlProcessor(unittest.TestCase):
         ref_id_not_found = find_target_ref_id(citation_map, "Non Existent Data")
         self.assertIsNone(ref_id_not_found)
 
+    def test_find_target_ref_id_with_index(self):
+        root = ET.fromstring(self.dummy_xml_content)
+        citation_index = build_citation_index(get_citation_map_et(root))
+        # 作成済みのインデックスを複数のタイトルの検索で使い回す
+        self.assertEqual(find_target_ref_id(None, "target data paper", citation_index=citation_index), 'ref3')
+        self.assertEqual(find_target_ref_id(None, "Another Citation", citation_index=citation_index), 'ref2')
+        self.assertIsNone(find_target_ref_id(None, "Non Existent Data", citation_index=citation_index))
+
     def test_parse_sections_recursive(self):
         root = ET.fromstring(self.dummy_xml_content)
         top_level_sections = root.find('.//ja:body/ce:sections', namespaces)
@@ -139,6 +166,18 @@ class TestXmlProcessor(unittest.TestCase):
         self.assertEqual(pred1, 1) # mention_count >= 2
         self.assertEqual(pred2, 1) # 'Data Collection' contains 'data' keyword
 
+    def test_analyze_single_xml_reuses_loaded_document(self):
+        _load_document.cache_clear()
+        self.addCleanup(_load_document.cache_clear)
+
+        mention_count, _, _, _ = analyze_single_xml(self.test_xml_path, "Target Data Paper")
+        self.assertEqual(mention_count, 3)
+        # 同じXMLを別のタイトルで解析する場合は、読み込み結果のキャッシュが使われる
+        mention_count, _, _, _ = analyze_single_xml(self.test_xml_path, "Another Citation")
+        self.assertEqual(mention_count, 1)
+        cache_info = _load_document.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+
     def test_analyze_single_xml_no_target_ref(self):
         mention_count, mentioned_sections, pred1, pred2 = analyze_single_xml(self.test_xml_path, "Non Existent Data Paper")
         self.assertEqual(mention_count, 0)
@@ -146,6 +185,47 @@ class TestXmlProcessor(unittest.TestCase):
         self.assertEqual(pred1, 0)
         self.assertEqual(pred2, 0)
 
+    def test_make_file_exists(self):
+        file_exists = _make_file_exists([self.test_xml_path, "missing_article.xml", os.path.join("no_such_dir", "article.xml")])
+        self.assertTrue(file_exists(self.test_xml_path))
+        self.assertFalse(file_exists("missing_article.xml"))
+        self.assertFalse(file_exists(os.path.join("no_such_dir", "article.xml")))
+
+    def test_make_file_exists_scans_directory_with_non_normalized_paths(self):
+        with tempfile.TemporaryDirectory() as xml_dir:
+            file_names = [f"article_{i}.xml" for i in range(_SCANDIR_THRESHOLD + 1)]
+            for file_name in file_names:
+                open(os.path.join(xml_dir, file_name), 'w').close()
+            # 同じディレクトリを異なる表記で指すパスを混在させる
+            xml_paths = [os.path.join(xml_dir, '.', file_name) if i % 2 else xml_dir + os.sep + os.sep + file_name for i, file_name in enumerate(file_names)]
+            missing_path = os.path.join(xml_dir, 'sub', '..', 'missing.xml')
+
+            with patch('os.path.exists', side_effect=AssertionError("ディレクトリを走査した場合はstatを呼ばない")):
+                file_exists = _make_file_exists(xml_paths + [missing_path])
+                self.assertTrue(all(file_exists(xml_path) for xml_path in xml_paths))
+                self.assertFalse(file_exists(missing_path))
+
+    @unittest.skipUnless(pa is not None, "pyarrowがインストールされていません")
+    def test_write_features_csv_matches_to_csv(self):
+        df_features = pd.DataFrame({
+            'citing_paper_eid': ['ceid1', 'ceid2'],
+            'citing_paper_doi': ['10.1000/1', '2024'],
+            'citing_paper_title': ['Title, with "quotes"', 'Title\nwith newline'],
+            'cited_data_paper_title': ['Target Data Paper', None],
+            'mention_count': [3, -1],
+            'mentioned_sections': [['Methods', "Data's Collection"], ['file_not_found']],
+            'prediction_rule1': [1, -1],
+            'prediction_rule2': [1, -1]
+        })
+        with tempfile.TemporaryDirectory() as csv_dir:
+            pyarrow_csv = os.path.join(csv_dir, "features_pyarrow.csv")
+            pandas_csv = os.path.join(csv_dir, "features_pandas.csv")
+            _write_features_csv(df_features, pyarrow_csv)
+            df_features.to_csv(pandas_csv, index=False, encoding='utf-8-sig')
+
+            # 引用符の付け方は異なるが、読み込んだ結果はto_csvで書き込んだ場合と同じになる
+            pd.testing.assert_frame_equal(pd.read_csv(pyarrow_csv), pd.read_csv(pandas_csv))
+
     @patch('os.path.exists', return_value=True)
     @patch('src.xml_processor.analyze_single_xml', return_value=(3, ['Methods'], 1, 1))
     def test_process_xml_for_features(self, mock_analyze_single_xml, mock_exists):
@@ -163,6 +243,28 @@ class TestXmlProcessor(unittest.TestCase):
         self.assertTrue(os.path.exists(self.test_features_csv))
         mock_analyze_single_xml.assert_called_once()
 
+    @patch('src.xml_processor.ProcessPoolExecutor', ThreadPoolExecutor)
+    def test_process_xml_for_features_groups_rows_by_file(self):
+        second_xml_path = "test_article_2.xml"
+        with open(second_xml_path, "w", encoding="utf-8") as f:
+            f.write(self.dummy_xml_content)
+        self.addCleanup(os.remove, second_xml_path)
+
+        df_targets = pd.DataFrame({
+            'citing_paper_eid': ['ceid1', 'ceid2', 'ceid1'],
+            'citing_paper_doi': ['cdio1', 'cdio2', 'cdio1'],
+            'citing_paper_title': ['Citing Paper Title', 'Citing Paper Title 2', 'Citing Paper Title'],
+            'cited_data_paper_title': ['Target Data Paper', 'Another Citation', 'Another Citation']
+        })
+        df_master = df_targets.assign(fulltext_xml_path=[self.test_xml_path, second_xml_path, self.test_xml_path], download_status='success')
+
+        with patch('src.xml_processor._analyze_xml_titles', wraps=_analyze_xml_titles) as mock_analyze_xml_titles:
+            df_features = process_xml_for_features(df_targets, df_master, self.test_output_dir, "test_features.csv", max_workers=2)
+
+        # 同じXMLを参照する行は1つのタスクにまとめられ、結果は元の行の順序で返る
+        self.assertEqual(mock_analyze_xml_titles.call_count, 2)
+        self.assertEqual(df_features['mention_count'].tolist(), [3, 1, 1])
+
     @patch('os.path.exists', return_value=False)
     @patch('src.xml_processor.analyze_single_xml')
     def test_process_xml_for_features_file_not_found(self, mock_analyze_single_xml, mock_exists):
@@ -178,5 +280,20 @@ class TestXmlProcessor(unittest.TestCase):
         self.assertEqual(df_features.iloc[0]['prediction_rule2'], -1)
         mock_analyze_single_xml.assert_not_called()
 
+    @patch('os.path.exists', return_value=False)
+    def test_process_xml_for_features_default_lists_are_independent(self, mock_exists):
+        df_targets = pd.DataFrame({
+            'citing_paper_eid': ['ceid1', 'ceid2'],
+            'citing_paper_doi': ['cdio1', 'cdio2'],
+            'citing_paper_title': ['Citing Paper Title', 'Citing Paper Title 2'],
+            'cited_data_paper_title': ['Target Data Paper', 'Target Data Paper']
+        })
+        df_master = df_targets.assign(fulltext_xml_path=['missing_1.xml', 'missing_2.xml'], download_status='success')
+        df_features = process_xml_for_features(df_targets, df_master, self.test_output_dir, "test_features.csv")
+
+        # ファイルが見つからない行のリストは行ごとに別のオブジェクトで、1行を変更しても他の行に影響しない
+        df_features.iloc[0]['mentioned_sections'].append('Methods')
+        self.assertEqual(df_features.iloc[1]['mentioned_sections'], ['file_not_found'])
+
 if __name__ == '__main__':
     unittest.main()